@@ -0,0 +1,70 @@
+# Benchmark: figure payload size and render latency with and without downsampling
+#
+#   python benchmarks/bench_downsample.py --rows 100000 1000000
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis.downsample import downsample
+from dex_analysis.figures import liquidity_figure, volume_figure
+
+
+def synthetic_chain(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    seven_day = rng.lognormal(16, 2.5, size=rows)
+    return pd.DataFrame({
+        'one_day_volume': seven_day / 7 * rng.uniform(0.5, 1.5, size=rows),
+        'seven_day_volume': seven_day,
+        'thirty_day_volume': seven_day * 30 / 7 * rng.uniform(0.7, 1.3, size=rows),
+        'usd_liquidity': rng.lognormal(15, 2.5, size=rows)
+    })
+
+
+# JSON payload of both dashboard figures: (bytes, seconds)
+def dash_payload(data, max_points):
+    start = time.perf_counter()
+    payload = json.dumps({'volume': volume_figure(data, max_points), 'liquidity': liquidity_figure(data, max_points)})
+    return len(payload), time.perf_counter() - start
+
+
+# Same drawing as plot_trading_volumes, rendered to PNG: seconds
+def render_volumes(data, max_points):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(14, 7))
+    for col in ['one_day_volume', 'seven_day_volume', 'thirty_day_volume']:
+        series = downsample(data[col], max_points) if max_points else data[col]
+        ax.plot(series, label=col)
+    ax.legend()
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Figure payload size and render latency with and without downsampling.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--points', type=int, default=2000)
+    args = parser.parse_args()
+
+    print('rows        mode     payload_kb  payload_s  render_s')
+    for rows in args.rows:
+        data = synthetic_chain(rows)
+        for mode, max_points in (('full', None), ('minmax', args.points)):
+            size, payload_time = dash_payload(data, max_points)
+            render_time = render_volumes(data, max_points)
+            print(f'{rows:<10,d}  {mode:<7s}  {size / 1024:10.1f}  {payload_time:9.3f}  {render_time:8.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Benchmark: per-chain feature engineering (chain_features) vs. the pandas groupby
+#
+# Before timing, chain_features is checked against a straightforward pandas
+# reference (groupby means + row-wise std/mean), which guards the volatility
+# index against regressing to the old index-misaligned assignment.
+#
+#   python benchmarks/bench_features.py --rows 10000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis.data import CHAINS, FEATURE_COLUMNS, VOLUME_COLUMNS
+from dex_analysis.features import chain_features
+
+
+# Cleaned, unified frame (metrics already in billions) with a few NaNs
+def synthetic_unified(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    seven_day = np.round(rng.lognormal(-4, 2.5, size=rows), 2)
+    data = pd.DataFrame({
+        'chain': pd.Categorical(np.asarray(CHAINS)[rng.integers(0, len(CHAINS), size=rows)]),
+        'one_day_volume': np.round(seven_day / 7 * rng.uniform(0.5, 1.5, size=rows), 2),
+        'seven_day_volume': seven_day,
+        'thirty_day_volume': np.round(seven_day * 30 / 7 * rng.uniform(0.7, 1.3, size=rows), 2),
+        'usd_liquidity': np.round(rng.lognormal(-5, 2.5, size=rows), 2),
+        'project_count': rng.integers(1, 25, size=rows),
+        'seven_day_volume_liquidity_ratio': rng.lognormal(0, 1, size=rows)
+    })
+    data.loc[rng.random(rows) < 0.001, 'thirty_day_volume'] = np.nan
+    return data
+
+
+def reference_features(data):
+    data = data.assign(volume_std=data[VOLUME_COLUMNS].std(axis=1) / data[VOLUME_COLUMNS].mean(axis=1))
+    data['volume_std'] = data['volume_std'].replace([np.inf, -np.inf], np.nan)
+    result = data.groupby('chain', observed=True)[FEATURE_COLUMNS].mean().reset_index()
+    result['liquidity_ratio'] = result['usd_liquidity'] / result[VOLUME_COLUMNS].mean(axis=1)
+    return result
+
+
+def check(rows=100_000):
+    data = synthetic_unified(rows, seed=1)
+    expected = reference_features(data)
+    result = chain_features(data)
+    assert list(result['chain']) == list(expected['chain'].astype(str))
+    np.testing.assert_allclose(result.drop(columns='chain').to_numpy(), expected.drop(columns='chain').to_numpy(), rtol=1e-9)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-chain feature engineering (chain_features) vs. the pandas groupby.')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--skip-reference', action='store_true', help='only time chain_features')
+    args = parser.parse_args()
+
+    check()
+    data = synthetic_unified(args.rows)
+    elapsed = timed(chain_features, data)
+    print(f'rows: {args.rows:,}')
+    print(f'chain_features:      {elapsed:7.3f}s  ({args.rows / elapsed / 1e6:.1f}M rows/s)')
+    if not args.skip_reference:
+        reference = timed(reference_features, data)
+        print(f'pandas reference:    {reference:7.3f}s  ({args.rows / reference / 1e6:.1f}M rows/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Benchmark: sparse liquidity graphs on synthetic pair sets
+#
+# Pairs connect random tokens with a heavy-tailed (hub-dominated) token
+# distribution and are spread over the six chains as pairs DataFrames, so
+# the timing covers build_graphs() from the frames, address interning
+# included. Before timing, widest routes are checked against a plain
+# Python max-bottleneck Dijkstra and the chain overlap against set
+# intersections on a small graph.
+#
+#   python benchmarks/bench_graph.py --pairs 3000000 --tokens 1000000
+import argparse
+import heapq
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis.data import CHAINS
+from dex_analysis.graph import build_graphs, components, hub_tokens, route, routes_from, token_overlap
+
+
+# {chain: DataFrame} with token_a_address, token_b_address and usd_liquidity
+def synthetic_pairs(pairs, tokens, seed=0):
+    rng = np.random.default_rng(seed)
+    addresses = np.char.add('0xtoken', np.arange(tokens).astype(str)).astype(object)
+    # Zipf-like draws make a few tokens hubs, as with WETH/USDC on real chains
+    token_a = np.minimum(rng.zipf(1.3, pairs) - 1, tokens - 1)
+    token_b = rng.integers(0, tokens, pairs)
+    chain = rng.integers(0, len(CHAINS), pairs)
+    liquidity = rng.lognormal(11, 2.5, pairs)
+    return {name: pd.DataFrame({
+        'token_a_address': addresses[token_a[chain == code]],
+        'token_b_address': addresses[token_b[chain == code]],
+        'usd_liquidity': liquidity[chain == code]
+    }) for code, name in enumerate(CHAINS)}
+
+
+# Max-bottleneck liquidity from `source` to every node, by modified Dijkstra
+def reference_widest(adjacency, source):
+    best = np.zeros(adjacency.shape[0])
+    best[source] = np.inf
+    heap = [(-np.inf, source)]
+    while heap:
+        width, node = heapq.heappop(heap)
+        width = -width
+        if width < best[node]:
+            continue
+        for start in range(adjacency.indptr[node], adjacency.indptr[node + 1]):
+            neighbour = adjacency.indices[start]
+            candidate = min(width, adjacency.data[start])
+            if candidate > best[neighbour]:
+                best[neighbour] = candidate
+                heapq.heappush(heap, (-candidate, neighbour))
+    return best
+
+
+def check(pairs=20_000, tokens=5_000):
+    index, graphs = build_graphs(synthetic_pairs(pairs, tokens, seed=1))
+    graph = graphs[CHAINS[0]]
+    labels, _ = components(graph)
+    source = int(np.argmax(np.diff(graph.adjacency.indptr)))
+    expected = reference_widest(graph.adjacency, source)
+    reachable = np.flatnonzero(labels == labels[source])
+    for target in reachable[:200]:
+        if target == source:
+            continue
+        hops = route(graph, index, index.decode(graph.tokens[source]), index.decode(graph.tokens[target]))
+        assert np.isclose(hops['usd_liquidity'].min(), expected[target]), target
+    predecessors = routes_from(graph, source, 'cost')
+    assert ((predecessors >= 0) == (labels == labels[source]))[np.arange(len(graph)) != source].all()
+
+    overlap = token_overlap(graphs)
+    sets = {chain: set(graph.tokens.tolist()) for chain, graph in graphs.items()}
+    for a in CHAINS:
+        for b in CHAINS:
+            assert overlap.loc[a, b] == len(sets[a] & sets[b]), (a, b)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sparse liquidity graphs on synthetic pair sets.')
+    parser.add_argument('--pairs', type=int, default=3_000_000)
+    parser.add_argument('--tokens', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    check()
+    datasets = synthetic_pairs(args.pairs, args.tokens)
+    print(f'pairs: {args.pairs:,}  tokens: {args.tokens:,}')
+    seconds, (index, graphs) = timed(build_graphs, datasets)
+    print(f'build_graphs:        {seconds:7.3f}s  (interns the token addresses)')
+    graph = graphs[CHAINS[0]]
+    print(f'  {CHAINS[0]}: {len(graph):,} tokens, {graph.edge_count:,} edges')
+    print(f'components:          {timed(components, graph)[0]:7.3f}s')
+    seconds, hubs = timed(hub_tokens, graph, index)
+    print(f'hub_tokens:          {seconds:7.3f}s')
+    source, target = hubs['address'].iloc[0], index.decode(graph.tokens[-1])
+    print(f'route (widest):      {timed(route, graph, index, source, target)[0]:7.3f}s  (builds the spanning tree)')
+    print(f'route (widest, 2nd): {timed(route, graph, index, source, target)[0]:7.3f}s')
+    print(f'route (cost):        {timed(route, graph, index, source, target, "cost")[0]:7.3f}s')
+    print(f'token_overlap:       {timed(token_overlap, graphs)[0]:7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# Benchmark: project counts via eval() per row vs. the vectorized list parser
+#
+#   python benchmarks/bench_list_columns.py --rows 1000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis.listcols import list_counts, parse_list_column
+from synthetic import PROJECTS
+
+
+# Synthetic 'projects' column with 1-16 project names per row
+def synthetic_projects(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, len(PROJECTS) + 1, size=rows)
+    reprs = [repr(PROJECTS[:n]) for n in range(len(PROJECTS) + 1)]
+    return pd.Series(np.take(reprs, lengths), name='projects')
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Project counts via eval() per row vs. the vectorized list parser.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    projects = synthetic_projects(args.rows)
+    baseline, baseline_time = timed(lambda s: s.apply(lambda x: len(eval(x))), projects)
+    counts, counts_time = timed(list_counts, projects)
+    parsed, parsed_time = timed(parse_list_column, projects)
+    assert np.array_equal(baseline.to_numpy(), counts.to_numpy())
+    assert np.array_equal(baseline.to_numpy(), parsed.counts)
+
+    print(f'rows: {args.rows:,}')
+    print(f'apply(len(eval(x))):  {baseline_time:8.3f}s')
+    print(f'list_counts:          {counts_time:8.3f}s  ({baseline_time / counts_time:.1f}x)')
+    print(f'parse_list_column:    {parsed_time:8.3f}s  ({baseline_time / parsed_time:.1f}x, counts + values)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Benchmark: per-chain top-K and IQR/MAD outlier flags vs. pandas groupby
+#
+# The pandas versions (groupby + nlargest, groupby quantiles and medians)
+# are timed for comparison; tests/test_outliers.py checks the engine
+# against them.
+#
+#   python benchmarks/bench_outliers.py --rows 5000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bench_features import synthetic_unified
+from dex_analysis.outliers import (IQR_K, MAD_SCALE, MAD_THRESHOLD, OUTLIER_METRICS, flag_outliers, outliers, robust_stats,
+                                   top_k)
+
+
+def synthetic_pairs(rows, seed=0):
+    data = synthetic_unified(rows, seed)
+    data['token_pair'] = pd.Categorical(np.char.add('PAIR-', (np.arange(rows) % 5000).astype(str)))
+    return data
+
+
+def reference_top_k(data, k):
+    frames = []
+    for metric in OUTLIER_METRICS:
+        top = data.groupby('chain', observed=True)[metric].nlargest(k)
+        frames.append(pd.DataFrame({'chain': top.index.get_level_values(0).astype(str), 'metric': metric,
+                                    'value': top.to_numpy(), 'row': top.index.get_level_values(1)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def reference_flags(data):
+    flags = {}
+    grouped = data.groupby('chain', observed=True)
+    for metric in OUTLIER_METRICS:
+        q1 = grouped[metric].transform(lambda v: v.quantile(0.25))
+        q3 = grouped[metric].transform(lambda v: v.quantile(0.75))
+        median = grouped[metric].transform('median')
+        mad = (data[metric] - median).abs().groupby(data['chain'], observed=True).transform('median')
+        iqr = q3 - q1
+        # Chains whose IQR or MAD is zero are not flagged
+        flags[f'{metric}_iqr'] = ((data[metric] < q1 - IQR_K * iqr) | (data[metric] > q3 + IQR_K * iqr)) & (iqr != 0)
+        flags[f'{metric}_mad'] = ((MAD_SCALE * (data[metric] - median) / mad).abs() > MAD_THRESHOLD) & (mad != 0)
+    return pd.DataFrame(flags)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-chain top-K and IQR/MAD outlier flags vs. pandas groupby.')
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--skip-reference', action='store_true', help='only time the engine')
+    args = parser.parse_args()
+
+    data = synthetic_pairs(args.rows)
+    print(f'rows: {args.rows:,}')
+    stats_time = timed(robust_stats, data)
+    print(f'robust_stats:        {stats_time:7.3f}s')
+    stats = robust_stats(data)
+    print(f'flag_outliers:       {timed(flag_outliers, data):7.3f}s')
+    print(f'  with stats given:  {timed(flag_outliers, data, stats=stats):7.3f}s')
+    print(f'outliers:            {timed(outliers, data):7.3f}s')
+    print(f'top_k:               {timed(top_k, data, k=args.k):7.3f}s')
+    if not args.skip_reference:
+        print(f'pandas top-k:        {timed(reference_top_k, data, args.k):7.3f}s')
+        print(f'pandas flags:        {timed(reference_flags, data):7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
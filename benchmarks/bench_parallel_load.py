@@ -0,0 +1,43 @@
+# Benchmark: serial vs. process-pool load-and-preprocess as the chain count grows
+#
+#   python benchmarks/bench_parallel_load.py --rows 50000 --chains 6 12 24 --workers 1 2 4 8
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis.data import ANALYSIS_COLUMNS
+from dex_analysis.parallel import preprocess_all
+from synthetic import write_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs. process-pool load-and-preprocess as the chain count grows.')
+    parser.add_argument('--rows', type=int, default=50_000, help='pairs per chain')
+    parser.add_argument('--chains', type=int, nargs='+', default=[6, 12, 24])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--all-columns', action='store_true', help='also load pool_ids/projects/addresses')
+    args = parser.parse_args()
+    columns = None if args.all_columns else ANALYSIS_COLUMNS
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        paths = write_snapshots(data_dir, args.rows, [f'chain{i:02d}' for i in range(max(args.chains))])
+        print(f'rows per chain: {args.rows:,}  cpus: {os.cpu_count()}')
+        print('chains  workers  seconds  speedup')
+        for n_chains in args.chains:
+            subset = dict(list(paths.items())[:n_chains])
+            serial = None
+            for workers in args.workers:
+                start = time.perf_counter()
+                # The cache is bypassed so every run measures the CSV parse
+                preprocess_all(subset, max_workers=workers, columns=columns, use_cache=False)
+                elapsed = time.perf_counter() - start
+                serial = serial or elapsed
+                print(f'{n_chains:6d}  {workers:7d}  {elapsed:7.2f}  {serial / elapsed:6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# Benchmark harness for the load -> clean -> aggregate -> plot pipeline
+#
+# Generates synthetic dex_pairs_<chain>.csv snapshots (spread over the six
+# chains) at each requested total size, runs the notebook stages one by one
+# and records wall time, rows processed and memory for every stage in a JSON
+# file. Passing --compare with an earlier results file flags stages that got
+# slower than --threshold times their previous timing (exit status 1).
+#
+#   python benchmarks/run_pipeline.py --sizes 10000 100000 1000000 10000000
+#   python benchmarks/run_pipeline.py --sizes 10000 --compare benchmarks/results/baseline.json
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from dex_analysis import cache
+from dex_analysis.data import AGGREGATE_COLUMNS, CHAINS, METRIC_COLUMNS, chain_paths, preprocess_data, scale_metrics
+from dex_analysis.dtypes import optimize_dtypes
+from dex_analysis.features import chain_features
+from dex_analysis.figures import liquidity_figure, volume_figure
+from dex_analysis.instrument import Hook, Tracer
+from dex_analysis.listcols import list_counts
+from synthetic import write_snapshots
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+# Prints one line per harness stage; stages nested inside them (the
+# package's own @traced functions) are only kept in the trace
+class StageHook(Hook):
+    def __init__(self, size):
+        self.size = size
+
+    def end(self, record):
+        if record['depth'] == 0:
+            print(f"{self.size:>10,d}  {record['name']:<22s} {record['seconds']:9.3f}s  rows={record['rows']}")
+
+
+class Recorder:
+    def __init__(self, size, trace_memory):
+        self.size = size
+        self.tracer = Tracer(hooks=[StageHook(size)], trace_memory=trace_memory)
+
+    # Time func() as a top-level stage, recording rows (an int or a callable on the result)
+    def stage(self, name, func, rows=None):
+        gc.collect()
+        self.tracer.start()
+        try:
+            with self.tracer.stage(name) as frame:
+                result = func()
+                frame['rows'] = rows(result) if callable(rows) else rows
+        finally:
+            self.tracer.finish()
+        return result
+
+    @property
+    def records(self):
+        return [{
+            'size': self.size,
+            'stage': record['name'],
+            'seconds': record['seconds'],
+            'rows': record['rows'],
+            'peak_traced_bytes': record['peak_bytes'],
+            'maxrss_bytes': record['maxrss_bytes']
+        } for record in self.tracer.records if record['depth'] == 0]
+
+
+def total_rows(frames):
+    return sum(len(frame) for frame in frames.values())
+
+
+# Data directory for one size, generated on first use and reused afterwards
+def prepare_data(workdir, size, mean_pools):
+    data_dir = os.path.join(workdir, f'rows_{size}')
+    rows = max(size // len(CHAINS), 1)
+    paths = chain_paths(data_dir)
+    if not all(os.path.exists(path) for path in paths.values()):
+        print(f'generating {size:,} rows in {data_dir}')
+        write_snapshots(data_dir, rows, CHAINS, mean_pools=mean_pools)
+    return paths
+
+
+def render_matplotlib(frames):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from dex_analysis.downsample import downsample
+
+    for data in frames.values():
+        fig, ax = plt.subplots(figsize=(14, 7))
+        for col in ['one_day_volume', 'seven_day_volume', 'thirty_day_volume']:
+            ax.plot(downsample(data[col]), label=col)
+        fig.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+
+
+def run_size(paths, size, args):
+    rec = Recorder(size, args.memory)
+    frames = rec.stage('load_csv', lambda: {chain: pd.read_csv(path) for chain, path in paths.items()}, total_rows)
+    for path in paths.values():
+        for stale in cache.cache_paths(path):
+            if os.path.exists(stale):
+                os.remove(stale)
+    rec.stage('load_cached_cold', lambda: {chain: cache.load_data(path) for chain, path in paths.items()}, total_rows)
+    rec.stage('load_cached_columns', lambda: {chain: cache.load_data(path, columns=['chain'] + METRIC_COLUMNS)
+                                              for chain, path in paths.items()}, total_rows)
+    frames = rec.stage('preprocess_data', lambda: {chain: preprocess_data(data) for chain, data in frames.items()}, total_rows)
+    all_dex_data = rec.stage('concat', lambda: pd.concat(frames.values(), ignore_index=True), len)
+    rec.stage('scale_metrics', lambda: scale_metrics(all_dex_data), len)
+    if size <= args.eval_max_rows:
+        rec.stage('project_count_eval', lambda: all_dex_data['projects'].apply(lambda x: len(eval(x))), len)
+    all_dex_data['project_count'] = rec.stage('project_count', lambda: list_counts(all_dex_data['projects']), len)
+    rec.stage('groupby_agg', lambda: all_dex_data.groupby('chain').agg({
+        'one_day_volume': 'mean',
+        'seven_day_volume': 'mean',
+        'thirty_day_volume': 'mean',
+        'usd_liquidity': 'mean',
+        'project_count': 'mean'
+    }).reset_index(), len)
+    rec.stage('chain_features', lambda: chain_features(all_dex_data), len)
+    lean, _ = rec.stage('optimize_dtypes', lambda: optimize_dtypes(all_dex_data.drop(columns=['pool_ids', 'projects'])),
+                        lambda result: len(result[0]))
+    rec.stage('groupby_agg_lean', lambda: lean.groupby('chain', observed=True)[AGGREGATE_COLUMNS].mean().reset_index(), len)
+    rec.stage('chain_features_lean', lambda: chain_features(lean), len)
+    rec.stage('figures_dash', lambda: [json.dumps([volume_figure(data), liquidity_figure(data)]) for data in frames.values()],
+              total_rows(frames))
+    rec.stage('figures_matplotlib', lambda: render_matplotlib(frames), total_rows(frames))
+    return rec.records
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+# Stages whose time grew beyond threshold x the baseline for the same size
+def regressions(results, baseline, threshold, min_seconds=0.05):
+    previous = {(r['size'], r['stage']): r['seconds'] for r in baseline['results']}
+    slower = []
+    for record in results:
+        before = previous.get((record['size'], record['stage']))
+        if before is not None and record['seconds'] > max(before, min_seconds) * threshold:
+            slower.append((record['size'], record['stage'], before, record['seconds']))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and memory-profile the DEX pipeline at synthetic scale.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--workdir', default=os.path.join(RESULTS_DIR, 'data'), help='where synthetic CSVs are kept')
+    parser.add_argument('--mean-pools', type=int, default=20, help='average pool_ids entries per pair')
+    parser.add_argument('--eval-max-rows', type=int, default=1_000_000,
+                        help='largest size at which the per-row eval() baseline is still run')
+    parser.add_argument('--memory', action='store_true', help='trace peak allocations per stage (slower)')
+    parser.add_argument('--output', default=None, help='results JSON (default: results/pipeline-<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(prepare_data(args.workdir, size, args.mean_pools), size, args))
+
+    payload = {'environment': environment(), 'results': results}
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f'results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = regressions(results, json.load(f), args.threshold)
+        for size, stage, before, after in slower:
+            print(f'REGRESSION {size:,} {stage}: {before:.3f}s -> {after:.3f}s')
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Synthetic dex_pairs_<chain>.csv snapshots with the real schema
+#
+# Metrics are log-normal like the checked-in data, pool_ids holds long lists
+# of 0x addresses and projects a stringified list of DEX names.
+import os
+
+import numpy as np
+import pandas as pd
+
+PROJECTS = ['uniswap', 'sushiswap', 'pancakeswap', 'curve', 'balancer', 'dodo', '0x API', 'kyberswap',
+            'clipper', 'airswap', 'trader_joe', 'velodrome', 'raydium', 'orca', 'quickswap', '1inch LOP']
+SYMBOLS = ['WETH', 'USDC', 'USDT', 'DAI', 'WBTC', 'ARB', 'OP', 'WMATIC', 'WBNB', 'SOL', 'LINK', 'UNI']
+
+
+# Random 20-byte hex addresses
+def _addresses(rng, n):
+    parts = [np.char.mod('%08x', rng.integers(0, 2 ** 32, size=n)) for _ in range(5)]
+    result = np.char.add('0x', parts[0])
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def _list_reprs(items, lengths):
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return ["['" + "', '".join(items[start:end]) + "']" if end > start else '[]'
+            for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+# One chain's snapshot; pools per pair ~ 1 + Poisson(mean_pools)
+def synthetic_pairs(rows, chain='ethereum', seed=0, mean_pools=40):
+    rng = np.random.default_rng(seed)
+    seven_day = rng.lognormal(16, 2.5, size=rows)
+    liquidity = rng.lognormal(15, 2.5, size=rows)
+    token_a = rng.integers(0, len(SYMBOLS), size=rows)
+    token_b = (token_a + rng.integers(1, len(SYMBOLS), size=rows)) % len(SYMBOLS)
+    n_pools = 1 + rng.poisson(mean_pools, size=rows)
+    n_projects = rng.integers(1, len(PROJECTS) + 1, size=rows)
+    # Each row lists n consecutive project names starting at a random one
+    starts = np.repeat(rng.integers(0, len(PROJECTS), size=rows), n_projects)
+    steps = np.arange(n_projects.sum()) - np.repeat(np.cumsum(n_projects) - n_projects, n_projects)
+    projects = np.asarray(PROJECTS, dtype=object)[(starts + steps) % len(PROJECTS)]
+    token_addresses = _addresses(rng, len(SYMBOLS))
+    return pd.DataFrame({
+        'all_time_volume': seven_day * rng.uniform(50, 500, size=rows),
+        'chain': chain,
+        'one_day_volume': seven_day / 7 * rng.uniform(0.5, 1.5, size=rows),
+        'pool_ids': _list_reprs(_addresses(rng, int(n_pools.sum())), n_pools),
+        'projects': _list_reprs(projects, n_projects),
+        'seven_day_volume': seven_day,
+        'seven_day_volume_liquidity_ratio': seven_day / liquidity,
+        'thirty_day_volume': seven_day * 30 / 7 * rng.uniform(0.7, 1.3, size=rows),
+        'token_a_address': token_addresses[token_a],
+        'token_b_address': token_addresses[token_b],
+        'token_pair': np.char.add(np.char.add(np.asarray(SYMBOLS)[token_a], '-'), np.asarray(SYMBOLS)[token_b]),
+        'usd_liquidity': liquidity
+    })
+
+
+# Write snapshots for `chains` into data_dir, returning {chain: path}
+def write_snapshots(data_dir, rows, chains, seed=0, mean_pools=40):
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {}
+    for i, chain in enumerate(chains):
+        path = os.path.join(data_dir, f'dex_pairs_{chain}.csv')
+        synthetic_pairs(rows, chain, seed + i, mean_pools).to_csv(path, index=False)
+        paths[chain] = path
+    return paths
@@ -0,0 +1,4 @@
+# Shared loading and analysis helpers for the DEX notebooks.
+#
+# Submodules are imported on demand so that pulling in one helper does not
+# drag in every optional dependency (pyarrow, plotting libraries, ...).
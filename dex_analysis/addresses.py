@@ -0,0 +1,178 @@
+# Dictionary-encoded token/pool addresses shared across chains
+#
+# Every hex (EVM) or base58 (Solana) address is mapped once to a compact
+# integer ID. Pairs then carry int32 token IDs, and the per-pair pool lists
+# are stored CSR-style (int32 pool IDs plus int64 row offsets), so joins and
+# cross-chain questions run over integer arrays instead of Python strings.
+import itertools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .listcols import parse_list_column
+
+# One row per pair: chain code, token IDs, and pools[pool_offsets[i]:pool_offsets[i + 1]]
+EncodedPairs = namedtuple('EncodedPairs', ['chain', 'token_a', 'token_b', 'pool_offsets', 'pools'])
+
+
+# EVM addresses are case-insensitive hex, base58 addresses are not
+def normalize_addresses(values):
+    values = pd.Series(values, dtype=object).fillna('')
+    evm = values.str.startswith('0x').to_numpy(dtype=bool)
+    result = values.to_numpy(dtype=object, copy=True)
+    if evm.any():
+        result[evm] = values[evm].str.lower().to_numpy(dtype=object)
+    return result
+
+
+class AddressIndex:
+    # Addresses are interned in a dict that grows with every encode() call;
+    # the address list gives the reverse mapping
+    def __init__(self):
+        self._ids = {}
+        self._addresses = []
+        self._decoded = None
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def __contains__(self, address):
+        return normalize_addresses([address])[0] in self._ids
+
+    # IDs of the distinct `uniques` (-1 for blanks and, unless add=True, for
+    # addresses not in the index)
+    def _unique_ids(self, uniques, add):
+        ids = np.fromiter(map(self._ids.get, uniques, itertools.repeat(-1)), dtype=np.int64, count=len(uniques))
+        if add:
+            new = np.flatnonzero((ids < 0) & (uniques != ''))
+            if len(new):
+                start = len(self._addresses)
+                added = uniques[new].tolist()
+                ids[new] = np.arange(start, start + len(new))
+                self._ids.update(zip(added, range(start, start + len(new))))
+                self._addresses.extend(added)
+                self._decoded = None
+        return ids
+
+    # Every value is hashed once by factorize; only the distinct addresses are
+    # normalized (merging case variants of EVM addresses) and go through the
+    # dict. Missing and blank addresses get -1, never an ID.
+    def _codes(self, values, add):
+        if not hasattr(values, 'dtype'):
+            values = np.asarray(values, dtype=object)
+        codes, uniques = pd.factorize(values)
+        normalized_codes, normalized = pd.factorize(normalize_addresses(uniques))
+        ids = self._unique_ids(np.asarray(normalized, dtype=object), add)[normalized_codes]
+        # Missing values have code -1 and pick the trailing -1
+        return np.append(ids, -1)[codes].astype(np.int32)
+
+    # Integer IDs for `values`, assigning new IDs to unseen addresses
+    def encode(self, values):
+        return self._codes(values, add=True)
+
+    # IDs of known addresses, -1 for addresses not in the index
+    def lookup(self, values):
+        return self._codes(values, add=False)
+
+    def decode(self, codes):
+        if self._decoded is None:
+            self._decoded = np.asarray(self._addresses, dtype=object)
+        return self._decoded[np.asarray(codes)]
+
+
+# Encode the address columns of one chain's pairs frame into `index`
+def encode_pairs(data, index, chain_code=0):
+    pools = parse_list_column(data['pool_ids'])
+    token_a, token_b, pool_ids = _encode_together(index, [data['token_a_address'], data['token_b_address'], pools.values])
+    return EncodedPairs(
+        chain=np.full(len(data), chain_code, dtype=np.int16),
+        token_a=token_a,
+        token_b=token_b,
+        pool_offsets=pools.offsets,
+        pools=pool_ids
+    )
+
+
+# Encode several address arrays in one pass, split back into one ID array each
+def _encode_together(index, arrays):
+    arrays = [np.asarray(values, dtype=object) for values in arrays]
+    codes = index.encode(np.concatenate(arrays) if arrays else np.empty(0, dtype=object))
+    return np.split(codes, np.cumsum([len(values) for values in arrays])[:-1])
+
+
+# Concatenate per-chain encodings, shifting the pool offsets
+def concat_pairs(parts):
+    parts = list(parts)
+    offsets = [parts[0].pool_offsets]
+    base = offsets[0][-1]
+    for part in parts[1:]:
+        offsets.append(part.pool_offsets[1:] + base)
+        base += part.pool_offsets[-1]
+    return EncodedPairs(
+        chain=np.concatenate([p.chain for p in parts]),
+        token_a=np.concatenate([p.token_a for p in parts]),
+        token_b=np.concatenate([p.token_b for p in parts]),
+        pool_offsets=np.concatenate(offsets),
+        pools=np.concatenate([p.pools for p in parts])
+    )
+
+
+# Build one shared index over {chain: DataFrame}; chain codes follow dict order.
+# All token and pool addresses of all chains are interned in a single pass.
+def build_address_index(datasets, index=None):
+    index = index if index is not None else AddressIndex()
+    chains = list(datasets)
+    frames = list(datasets.values())
+    pools = [parse_list_column(data['pool_ids']) for data in frames]
+    token_a, token_b, pool_ids = _encode_together(index, [
+        np.concatenate([data['token_a_address'].to_numpy(dtype=object) for data in frames]),
+        np.concatenate([data['token_b_address'].to_numpy(dtype=object) for data in frames]),
+        np.concatenate([parsed.values for parsed in pools])
+    ])
+    counts = np.concatenate([parsed.counts for parsed in pools])
+    pool_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=pool_offsets[1:])
+    chain = np.repeat(np.arange(len(frames), dtype=np.int16), [len(data) for data in frames])
+    return index, EncodedPairs(chain, token_a, token_b, pool_offsets, pool_ids), chains
+
+
+# Chain codes and token IDs of {chain: DataFrame}, without parsing the pool
+# lists (pool_offsets are all zero); for questions about the tokens only
+def encode_tokens(datasets, index):
+    frames = list(datasets.values())
+    token_a, token_b = _encode_together(index, [
+        np.concatenate([data['token_a_address'].to_numpy(dtype=object) for data in frames]),
+        np.concatenate([data['token_b_address'].to_numpy(dtype=object) for data in frames])
+    ])
+    chain = np.repeat(np.arange(len(frames), dtype=np.int16), [len(data) for data in frames])
+    return EncodedPairs(chain, token_a, token_b, np.zeros(len(chain) + 1, dtype=np.int64), np.empty(0, dtype=np.int32))
+
+
+# Long-format (pair row, pool ID) arrays for per-pool joins
+def pair_pools(encoded):
+    rows = np.repeat(np.arange(len(encoded.chain)), np.diff(encoded.pool_offsets))
+    return rows, encoded.pools
+
+
+# Tokens that appear in pairs on at least `min_chains` distinct chains
+def tokens_on_multiple_chains(encoded, index, chains, min_chains=2):
+    tokens = np.concatenate([encoded.token_a, encoded.token_b]).astype(np.int64)
+    chain = np.concatenate([encoded.chain, encoded.chain]).astype(np.int64)
+    # Pairs with a missing address carry -1
+    known = tokens >= 0
+    tokens, chain = tokens[known], chain[known]
+    n_chains = max(len(chains), 1)
+    keys = np.unique(tokens * n_chains + chain)
+    token_ids, token_chains = np.divmod(keys, n_chains)
+    counts = np.bincount(token_ids, minlength=len(index))
+    selected = np.flatnonzero(counts >= min_chains)
+    # Comma-joined chain names per selected token, grouped from the sorted keys
+    mask = np.isin(token_ids, selected)
+    names = pd.Series(np.asarray(chains, dtype=object)[token_chains[mask]]).groupby(token_ids[mask]).agg(', '.join)
+    result = pd.DataFrame({
+        'address': index.decode(selected),
+        'chain_count': counts[selected],
+        'chains': names.reindex(selected).to_numpy()
+    })
+    return result.sort_values('chain_count', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,140 @@
+# Columnar on-disk cache for the dex_pairs_<chain>.csv snapshots
+#
+# The first read of a CSV parses it once with an explicit schema and writes a
+# Parquet copy next to it (in a .cache directory). Later reads check the copy
+# against the source file's size/mtime, falling back to a content hash when
+# those changed, and load only the requested columns from Parquet, so the
+# wide pool_ids/projects strings are never touched unless asked for.
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+
+from .data import DTYPES
+from .instrument import traced
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pq = None
+
+CACHE_DIRNAME = '.cache'
+
+
+def cache_paths(file_path, cache_dir=None):
+    directory, name = os.path.split(os.path.abspath(file_path))
+    cache_dir = cache_dir or os.path.join(directory, CACHE_DIRNAME)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(cache_dir, stem + '.parquet'), os.path.join(cache_dir, stem + '.json')
+
+
+# SHA-256 of a file, read in blocks
+def file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Identity of the source CSV: cheap stat fields plus an optional content hash
+def fingerprint(file_path, with_hash=True):
+    stat = os.stat(file_path)
+    result = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        result['sha256'] = file_hash(file_path)
+    return result
+
+
+def read_json(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Sibling temp file for an atomic write of `path`; unique per writer, so
+# processes rebuilding the same cache entry never share a temp file
+def temp_path(path):
+    return f'{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp'
+
+
+# Write to a temp file and os.replace it into place; the temp file is
+# removed if `write` fails
+def replace_atomic(path, write):
+    tmp_path = temp_path(path)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_json(path, payload):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+    replace_atomic(path, write)
+
+
+# Compare a file against a stored fingerprint: stat fields first, content
+# hash only when they moved. Returns the (refreshed) fingerprint on a match,
+# None when the content changed.
+def match_fingerprint(file_path, stored):
+    if not stored:
+        return None
+    current = fingerprint(file_path, with_hash=False)
+    if current['size'] == stored.get('size') and current['mtime_ns'] == stored.get('mtime_ns'):
+        return dict(stored)
+    if current['size'] != stored.get('size') or file_hash(file_path) != stored.get('sha256'):
+        return None
+    return dict(stored, **current)
+
+
+# Whether the cached copy still matches the CSV; refreshes the stored stat
+# fields when only the mtime moved but the content is unchanged
+def is_fresh(file_path, cache_dir=None):
+    parquet_path, meta_path = cache_paths(file_path, cache_dir)
+    meta = read_json(meta_path)
+    if meta is None or not os.path.exists(parquet_path):
+        return False
+    matched = match_fingerprint(file_path, meta)
+    if matched is None:
+        return False
+    if matched != meta:
+        write_json(meta_path, matched)
+    return True
+
+
+def read_csv_typed(file_path, columns=None):
+    dtype = {col: kind for col, kind in DTYPES.items() if columns is None or col in columns}
+    return pd.read_csv(file_path, usecols=columns, dtype=dtype)
+
+
+# Parse the CSV once and store it as Parquet alongside its fingerprint
+def build_cache(file_path, cache_dir=None):
+    parquet_path, meta_path = cache_paths(file_path, cache_dir)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    meta = fingerprint(file_path)
+    data = read_csv_typed(file_path)
+    replace_atomic(parquet_path, lambda tmp_path: data.to_parquet(tmp_path, index=False))
+    write_json(meta_path, meta)
+    return data
+
+
+# Load a snapshot, optionally restricted to `columns`, through the cache.
+# Without pyarrow this degrades to a typed pd.read_csv.
+@traced('load_data')
+def load_data(file_path, columns=None, cache_dir=None, use_cache=True):
+    columns = list(columns) if columns is not None else None
+    if not use_cache or pq is None:
+        return read_csv_typed(file_path, columns)
+    if not is_fresh(file_path, cache_dir):
+        data = build_cache(file_path, cache_dir)
+        return data[columns] if columns is not None else data
+    parquet_path, _ = cache_paths(file_path, cache_dir)
+    return pq.read_table(parquet_path, columns=columns).to_pandas()
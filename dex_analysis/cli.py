@@ -0,0 +1,102 @@
+# Command line entry point: python -m dex_analysis <command> ...
+#
+# Only argparse is imported at startup; pandas, pyarrow and the plotting
+# libraries are pulled in by the command that needs them, so quick runs
+# (e.g. --no-figures from cron) do not pay for seaborn/plotly/dash.
+import argparse
+import sys
+
+
+def report(args):
+    from .report import run_report
+
+    if not args.no_figures:
+        from .plotting import use_headless_backend
+
+        # Figures are only saved to files, also when rendered in this process
+        use_headless_backend()
+    chain_aggregates, written, skipped = run_report(args.data_dir, args.output, chains=args.chains,
+                                                    figures=not args.no_figures, formats=args.format, trace=args.trace,
+                                                    verbose=args.verbose, workers=args.workers, force=args.force,
+                                                    dtype_atol=args.dtype_tolerance)
+    print(f'wrote chain_aggregates for {len(chain_aggregates)} chains and {len(written)} figure files to {args.output}'
+          f' ({len(skipped)} figures unchanged)')
+
+
+def fetch(args):
+    from .fetch import fetch_snapshots
+
+    results = fetch_snapshots(args.base_url, args.data_dir, chains=args.chains, default_rate=args.rate,
+                              retries=args.retries, timeout=args.timeout)
+    for result in results.values():
+        detail = f'{result.bytes:,} bytes' if result.status == 'updated' else (result.error or '')
+        print(f'{result.chain}: {result.status} in {result.seconds:.2f}s ({result.attempts} attempts) {detail}'.rstrip())
+    if any(result.status == 'failed' for result in results.values()):
+        return 1
+
+
+def history(args):
+    from .data import chain_paths
+    from .history import HistoryStore
+
+    store = HistoryStore(args.history_dir) if args.history_dir else HistoryStore.for_data_dir(args.data_dir)
+    for chain, entry in store.ingest_all(chain_paths(args.data_dir, args.chains), args.date).items():
+        if entry is None:
+            print(f'{chain}: unchanged since the last snapshot')
+        else:
+            print(f"{chain}: {entry['date']} {entry['changed']} changed, {entry['removed']} removed of {entry['pairs']} pairs")
+
+
+def serve(args):
+    from .serve import main as serve_main
+
+    serve_main(args.serve_args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m dex_analysis', description='DEX trading volume and liquidity analysis.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = commands.add_parser('report', help='compute chain aggregates and render the report figures')
+    report_parser.add_argument('--data-dir', default='dex_data', help='directory with dex_pairs_<chain>.csv files')
+    report_parser.add_argument('--output', default='report', help='output directory')
+    report_parser.add_argument('--chains', nargs='+', default=None, help='chain slugs (default: all six)')
+    report_parser.add_argument('--format', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    report_parser.add_argument('--no-figures', action='store_true', help='only write the aggregates')
+    report_parser.add_argument('--workers', type=int, default=None, help='rendering processes (default: one per CPU)')
+    report_parser.add_argument('--force', action='store_true', help='re-render figures even if their inputs are unchanged')
+    report_parser.add_argument('--dtype-tolerance', type=float, default=0.005,
+                               help='largest absolute error (in billions) allowed when downcasting metrics to float32')
+    report_parser.add_argument('--trace', action='store_true', help='write a per-stage trace.json')
+    report_parser.add_argument('--verbose', action='store_true', help='print per-stage timings')
+    report_parser.set_defaults(func=report)
+
+    fetch_parser = commands.add_parser('fetch', help='download the per-chain snapshots into the data directory')
+    fetch_parser.add_argument('--base-url', required=True, help='feed serving dex_pairs_<chain>.csv files')
+    fetch_parser.add_argument('--data-dir', default='dex_data')
+    fetch_parser.add_argument('--chains', nargs='+', default=None, help='chain slugs (default: all six)')
+    fetch_parser.add_argument('--rate', type=float, default=10.0, help='requests per second per host')
+    fetch_parser.add_argument('--retries', type=int, default=3)
+    fetch_parser.add_argument('--timeout', type=float, default=300, help='seconds per request')
+    fetch_parser.set_defaults(func=fetch)
+
+    history_parser = commands.add_parser('history', help='record the current snapshots as one dated snapshot (changes only)')
+    history_parser.add_argument('--data-dir', default='dex_data', help='directory with dex_pairs_<chain>.csv files')
+    history_parser.add_argument('--history-dir', default=None, help='history location (default: <data-dir>/history)')
+    history_parser.add_argument('--chains', nargs='+', default=None, help='chain slugs (default: all six)')
+    history_parser.add_argument('--date', default=None, help='snapshot date, YYYY-MM-DD (default: file modification date)')
+    history_parser.set_defaults(func=history)
+
+    serve_parser = commands.add_parser('serve', help='serve the dashboards (options as python -m dex_analysis.serve)')
+    serve_parser.add_argument('serve_args', nargs=argparse.REMAINDER)
+    serve_parser.set_defaults(func=serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# Schema and file layout of the dex_pairs_<chain>.csv snapshots
+import os
+
+import numpy as np
+
+from .instrument import traced
+
+# Chain slugs as they appear in the file names and in the 'chain' column
+CHAINS = ['ethereum', 'bnb', 'solana', 'polygon', 'arbitrum', 'optimism']
+
+# Display names used by the notebooks
+CHAIN_LABELS = {
+    'ethereum': 'Ethereum',
+    'bnb': 'Binance Smart Chain',
+    'solana': 'Solana',
+    'polygon': 'Polygon',
+    'arbitrum': 'Arbitrum',
+    'optimism': 'Optimism'
+}
+
+# USD metrics that the report rescales to billions
+METRIC_COLUMNS = ['all_time_volume', 'one_day_volume', 'seven_day_volume', 'thirty_day_volume', 'usd_liquidity']
+VOLUME_COLUMNS = ['one_day_volume', 'seven_day_volume', 'thirty_day_volume']
+
+# Stringified Python lists, by far the widest columns in each file
+LIST_COLUMNS = ['pool_ids', 'projects']
+ADDRESS_COLUMNS = ['token_a_address', 'token_b_address']
+
+# Column types of a snapshot, used to parse the CSVs without type inference
+DTYPES = {
+    'all_time_volume': 'float64',
+    'chain': 'string',
+    'one_day_volume': 'float64',
+    'pool_ids': 'string',
+    'projects': 'string',
+    'seven_day_volume': 'float64',
+    'seven_day_volume_liquidity_ratio': 'float64',
+    'thirty_day_volume': 'float64',
+    'token_a_address': 'string',
+    'token_b_address': 'string',
+    'token_pair': 'string',
+    'usd_liquidity': 'float64'
+}
+
+# Per-chain means reported in chain_aggregates
+AGGREGATE_COLUMNS = VOLUME_COLUMNS + ['usd_liquidity', 'project_count']
+
+# Per-chain means of the engineered row features (volume_std is the row-level
+# coefficient of variation across the volume windows)
+FEATURE_COLUMNS = AGGREGATE_COLUMNS + ['volume_std', 'seven_day_volume_liquidity_ratio']
+
+# Columns needed by the volume/liquidity analyses (no address lists)
+ANALYSIS_COLUMNS = ['chain', 'token_pair'] + METRIC_COLUMNS + ['seven_day_volume_liquidity_ratio']
+
+
+def chain_path(data_dir, chain):
+    return os.path.join(data_dir, f'dex_pairs_{chain}.csv')
+
+
+# Map every chain to its snapshot file inside data_dir
+def chain_paths(data_dir, chains=None):
+    return {chain: chain_path(data_dir, chain) for chain in (chains or CHAINS)}
+
+
+# Convert the USD metrics to billions rounded to two decimals, as in the report
+@traced()
+def scale_metrics(data, columns=METRIC_COLUMNS):
+    for col in columns:
+        if col in data:
+            data[col] = (data[col] / 1e9).round(2)
+    return data
+
+
+# Trading notebook cleaning: inf -> NaN, then forward-fill gaps
+@traced()
+def preprocess_data(data):
+    # Replace any inf or -inf with NaN
+    data.replace([np.inf, -np.inf], np.nan, inplace=True)
+    # Fill missing values
+    data.ffill(inplace=True)
+    return data
@@ -0,0 +1,227 @@
+# File-backed SQLite store of the cross-chain pair snapshots
+#
+# ingest() loads every dex_pairs_<chain>.csv into one database: a `pairs`
+# table with the metrics (raw USD, as in the CSVs), project and pool counts,
+# and two side tables that normalize the list columns into one row per
+# (pair, pool address) and (pair, project). Chain, token_pair, the token
+# addresses and the side tables' keys are indexed. Like AggregateStore, a
+# re-ingest only replaces the chains whose file fingerprint changed.
+#
+#     db = DexDatabase.for_data_dir('dex_data')
+#     db.ingest(chain_paths('dex_data'))
+#     db.top_pairs('seven_day_volume_liquidity_ratio', chain='arbitrum')
+#     db.liquidity_by_project()
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import cache
+from .addresses import normalize_addresses
+from .data import ADDRESS_COLUMNS, METRIC_COLUMNS
+from .instrument import traced
+from .listcols import parse_list_column
+
+DATABASE_FILENAME = 'dex.sqlite'
+
+# Columns that the query helpers accept for ordering/aggregation
+PAIR_METRICS = METRIC_COLUMNS + ['seven_day_volume_liquidity_ratio', 'project_count', 'pool_count']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    chain TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    pair_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    pair_id INTEGER PRIMARY KEY,
+    chain TEXT NOT NULL,
+    token_pair TEXT,
+    token_a_address TEXT,
+    token_b_address TEXT,
+    all_time_volume REAL,
+    one_day_volume REAL,
+    seven_day_volume REAL,
+    thirty_day_volume REAL,
+    usd_liquidity REAL,
+    seven_day_volume_liquidity_ratio REAL,
+    project_count INTEGER NOT NULL,
+    pool_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pair_pools (
+    pair_id INTEGER NOT NULL REFERENCES pairs (pair_id),
+    pool_address TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pair_projects (
+    pair_id INTEGER NOT NULL REFERENCES pairs (pair_id),
+    project TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pairs_chain ON pairs (chain);
+CREATE INDEX IF NOT EXISTS pairs_token_pair ON pairs (token_pair);
+CREATE INDEX IF NOT EXISTS pairs_token_a ON pairs (token_a_address);
+CREATE INDEX IF NOT EXISTS pairs_token_b ON pairs (token_b_address);
+CREATE INDEX IF NOT EXISTS pair_pools_pair ON pair_pools (pair_id);
+CREATE INDEX IF NOT EXISTS pair_pools_address ON pair_pools (pool_address);
+CREATE INDEX IF NOT EXISTS pair_projects_pair ON pair_projects (pair_id);
+CREATE INDEX IF NOT EXISTS pair_projects_project ON pair_projects (project);
+"""
+
+PAIR_COLUMNS = ['chain', 'token_pair'] + ADDRESS_COLUMNS + METRIC_COLUMNS + \
+    ['seven_day_volume_liquidity_ratio', 'project_count', 'pool_count']
+
+
+def _metric(column):
+    if column not in PAIR_METRICS:
+        raise ValueError(f'unknown metric {column!r}, expected one of {PAIR_METRICS}')
+    return column
+
+
+# Python values for sqlite3: NaN/NA -> None, numpy scalars -> int/float/str
+def _column_values(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+class DexDatabase:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+
+    # Database kept in the data directory's cache folder
+    @classmethod
+    def for_data_dir(cls, data_dir):
+        return cls(os.path.join(data_dir, cache.CACHE_DIRNAME, DATABASE_FILENAME))
+
+    # One connection per thread and process: sqlite3 connections must not be
+    # shared across threads or inherited by forked (gunicorn) workers
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def chains(self):
+        return [row[0] for row in self.connection().execute('SELECT chain FROM snapshots ORDER BY chain')]
+
+    # Load the chains of {chain: path} whose file changed (or is new) and drop
+    # stored chains that are no longer listed. Returns the reloaded chains.
+    @traced(rows=len)
+    def ingest(self, file_paths):
+        file_paths = dict(file_paths)
+        stored = dict(self.connection().execute('SELECT chain, fingerprint FROM snapshots').fetchall())
+        changed = []
+        for chain, file_path in file_paths.items():
+            matched = cache.match_fingerprint(file_path, json.loads(stored[chain]) if chain in stored else None)
+            if matched is not None:
+                if matched != json.loads(stored[chain]):
+                    with self.connection() as connection:
+                        connection.execute('UPDATE snapshots SET fingerprint = ? WHERE chain = ?',
+                                           (json.dumps(matched), chain))
+                continue
+            self._load_chain(chain, file_path)
+            changed.append(chain)
+        for chain in set(stored) - set(file_paths):
+            with self.connection() as connection:
+                self._delete_chain(connection, chain)
+        return changed
+
+    def _delete_chain(self, connection, chain):
+        pair_ids = 'SELECT pair_id FROM pairs WHERE chain = ?'
+        connection.execute(f'DELETE FROM pair_pools WHERE pair_id IN ({pair_ids})', (chain,))
+        connection.execute(f'DELETE FROM pair_projects WHERE pair_id IN ({pair_ids})', (chain,))
+        connection.execute('DELETE FROM pairs WHERE chain = ?', (chain,))
+        connection.execute('DELETE FROM snapshots WHERE chain = ?', (chain,))
+
+    # Replace one chain's rows in a single transaction
+    def _load_chain(self, chain, file_path):
+        fingerprint = cache.fingerprint(file_path)
+        data = cache.load_data(file_path)
+        pools = parse_list_column(data['pool_ids'])
+        projects = parse_list_column(data['projects'])
+        data['chain'] = data['chain'].fillna(chain)
+        for col in ADDRESS_COLUMNS:
+            data[col] = normalize_addresses(data[col])
+        data['project_count'] = projects.counts
+        data['pool_count'] = pools.counts
+
+        with self.connection() as connection:
+            self._delete_chain(connection, chain)
+            first_id = connection.execute('SELECT COALESCE(MAX(pair_id), 0) + 1 FROM pairs').fetchone()[0]
+            pair_ids = np.arange(first_id, first_id + len(data), dtype=np.int64)
+            placeholders = ', '.join('?' * (len(PAIR_COLUMNS) + 1))
+            rows = zip(pair_ids.tolist(), *(_column_values(data[col]) for col in PAIR_COLUMNS))
+            connection.executemany(f"INSERT INTO pairs (pair_id, {', '.join(PAIR_COLUMNS)}) VALUES ({placeholders})", rows)
+            connection.executemany('INSERT INTO pair_pools (pair_id, pool_address) VALUES (?, ?)',
+                                   zip(np.repeat(pair_ids, pools.counts).tolist(),
+                                       normalize_addresses(pools.values).tolist()))
+            connection.executemany('INSERT INTO pair_projects (pair_id, project) VALUES (?, ?)',
+                                   zip(np.repeat(pair_ids, projects.counts).tolist(), projects.values.tolist()))
+            connection.execute('INSERT INTO snapshots (chain, fingerprint, pair_count) VALUES (?, ?, ?)',
+                               (chain, json.dumps(fingerprint), len(data)))
+
+    # Query API: every helper returns a DataFrame
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection(), params=params)
+
+    # Pairs with the largest `metric`, optionally on one chain
+    def top_pairs(self, metric='seven_day_volume', chain=None, limit=10):
+        metric = _metric(metric)
+        where, params = ('WHERE chain = ? AND', [chain]) if chain else ('WHERE', [])
+        return self.query(f'SELECT * FROM pairs {where} {metric} IS NOT NULL ORDER BY {metric} DESC LIMIT ?',
+                          params + [limit])
+
+    # Number of pairs and total liquidity/volume of the pairs each project
+    # trades (a pair listed under several projects counts for each of them)
+    def liquidity_by_project(self, chain=None, limit=None):
+        where, params = ('WHERE p.chain = ?', [chain]) if chain else ('', [])
+        sql = f"""
+            SELECT j.project, COUNT(*) AS pair_count, SUM(p.usd_liquidity) AS usd_liquidity,
+                   SUM(p.seven_day_volume) AS seven_day_volume
+            FROM pair_projects j JOIN pairs p ON p.pair_id = j.pair_id
+            {where}
+            GROUP BY j.project ORDER BY usd_liquidity DESC"""
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self.query(sql, params)
+
+    # Pairs that trade `address` on either side
+    def pairs_for_token(self, address, chain=None):
+        address = normalize_addresses([address])[0]
+        chain_filter, params = (' AND chain = ?', [chain]) if chain else ('', [])
+        return self.query(f"""
+            SELECT * FROM pairs WHERE token_a_address = ?{chain_filter}
+            UNION ALL
+            SELECT * FROM pairs WHERE token_b_address = ? AND token_a_address != ?{chain_filter}
+            ORDER BY usd_liquidity DESC""", [address] + params + [address, address] + params)
+
+    # Pairs routed through one pool address
+    def pairs_for_pool(self, pool_address):
+        return self.query("""
+            SELECT p.* FROM pair_pools j JOIN pairs p ON p.pair_id = j.pair_id
+            WHERE j.pool_address = ?""", [normalize_addresses([pool_address])[0]])
+
+    # Per-chain pair count and means of the metrics
+    def chain_summary(self, metrics=('one_day_volume', 'seven_day_volume', 'thirty_day_volume', 'usd_liquidity',
+                                     'project_count')):
+        averages = ', '.join(f'AVG({_metric(col)}) AS {col}' for col in metrics)
+        return self.query(f'SELECT chain, COUNT(*) AS pair_count, {averages} FROM pairs GROUP BY chain ORDER BY chain')
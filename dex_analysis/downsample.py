@@ -0,0 +1,71 @@
+# Pixel-budgeted downsampling of the volume/liquidity series for plotting
+#
+# A line chart cannot show more than a couple of points per horizontal
+# pixel, so long series are reduced before they reach matplotlib or the
+# browser. 'minmax' keeps the first, last, minimum and maximum point of
+# every bucket (so spikes and outliers always survive); 'lttb' is the
+# Largest-Triangle-Three-Buckets selection, which follows the visual shape
+# more closely at the same point count.
+import numpy as np
+import pandas as pd
+
+# Roughly two points per pixel of a 14in/100dpi figure or a full-width graph
+DEFAULT_POINTS = 2000
+
+
+# Indices of the per-bucket first/min/max/last points, about max_points in total
+def minmax_indices(y, max_points=DEFAULT_POINTS):
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    size = int(np.ceil(n / max(max_points // 4, 1)))
+    n_buckets = int(np.ceil(n / size))
+    # Pad the last bucket; NaNs never win argmin/argmax
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    lows = np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1)
+    highs = np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1)
+    starts = np.arange(n_buckets) * size
+    ends = np.minimum(starts + size, n) - 1
+    return np.unique(np.concatenate([starts, starts + lows, starts + highs, ends]))
+
+
+# Largest-Triangle-Three-Buckets: one point per bucket, chosen to maximize the
+# triangle area with the previous pick and the next bucket's centroid
+def lttb_indices(x, y, max_points=DEFAULT_POINTS):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+# Reduced copy of `series` (index preserved) with at most ~max_points points
+def downsample(series, max_points=DEFAULT_POINTS, method='minmax'):
+    if max_points is None or len(series) <= max_points:
+        return series
+    values = series.dropna()
+    if method == 'minmax':
+        indices = minmax_indices(values.to_numpy(dtype=np.float64), max_points)
+    elif method == 'lttb':
+        x = values.index.to_numpy() if pd.api.types.is_numeric_dtype(values.index) else np.arange(len(values))
+        indices = lttb_indices(x, values.to_numpy(dtype=np.float64), max_points)
+    else:
+        raise ValueError(f'unknown downsampling method: {method!r}')
+    return values.iloc[indices]
@@ -0,0 +1,81 @@
+# Memory-lean dtypes for the unified DEX frame
+#
+# After concat and scaling, 'chain' and 'token_pair' are repeated strings and
+# the metrics are float64 values rounded to two decimals. optimize_dtypes()
+# stores the label columns as categoricals (when that is smaller than the
+# strings) and downcasts numeric columns to float32 / the smallest integer
+# type, but a float column is only downcast when every value survives the
+# round trip within the given tolerance. The returned footprint table lists
+# each column's dtype and bytes before/after.
+import numpy as np
+import pandas as pd
+
+from .instrument import traced
+
+CATEGORY_COLUMNS = ['chain', 'token_pair']
+
+# Half of the last digit kept by scale_metrics (billions, two decimals)
+DEFAULT_ATOL = 0.005
+
+
+# Categorical with the categories in order of first appearance, so plots that
+# follow the category order keep the original chain order
+def to_categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    categories = series.dropna().unique()
+    return series.astype(pd.CategoricalDtype(categories=categories))
+
+
+# float32 copy of `values` if every value is within atol + rtol * |value| of
+# the original (NaN and +-inf must round-trip exactly), otherwise None
+def downcast_float(values, atol=DEFAULT_ATOL, rtol=0.0):
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(over='ignore', invalid='ignore'):
+        down = values.astype(np.float32)
+        error = np.abs(down.astype(np.float64) - values)
+    finite = np.isfinite(values)
+    if not np.array_equal(np.isfinite(down), finite) or not np.array_equal(np.isnan(down), np.isnan(values)):
+        return None
+    if not (error[finite] <= atol + rtol * np.abs(values[finite])).all():
+        return None
+    return down
+
+
+def _downcast(series, atol, rtol):
+    if pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+        down = downcast_float(series.to_numpy(dtype=np.float64, na_value=np.nan), atol, rtol)
+        return series if down is None else pd.Series(down, index=series.index, name=series.name)
+    if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+
+def memory_footprint(data):
+    return data.memory_usage(index=False, deep=True)
+
+
+# Optimize `data` in place; returns (data, footprint) where footprint has one
+# row per column plus a 'total' row
+@traced(rows=lambda result: len(result[0]))
+def optimize_dtypes(data, categories=CATEGORY_COLUMNS, atol=DEFAULT_ATOL, rtol=0.0):
+    dtypes_before = data.dtypes.astype(str)
+    bytes_before = memory_footprint(data)
+    for col in data.columns:
+        if col in categories:
+            # Mostly-unique labels (token_pair in small snapshots) are kept as
+            # strings when the categorical would be larger
+            categorical = to_categorical(data[col])
+            if categorical.memory_usage(index=False, deep=True) < bytes_before[col]:
+                data[col] = categorical
+        else:
+            data[col] = _downcast(data[col], atol, rtol)
+    footprint = pd.DataFrame({
+        'dtype_before': dtypes_before,
+        'dtype_after': data.dtypes.astype(str),
+        'bytes_before': bytes_before,
+        'bytes_after': memory_footprint(data)
+    })
+    footprint.loc['total'] = ['', '', footprint['bytes_before'].sum(), footprint['bytes_after'].sum()]
+    footprint.index.name = 'column'
+    return data, footprint
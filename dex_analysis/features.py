@@ -0,0 +1,93 @@
+# Per-chain feature engineering in one grouped NumPy pass
+#
+# The metric columns are copied once into a contiguous float64 matrix and
+# the chain labels are factorized into integer codes. Row features (the
+# volume coefficient of variation) are computed with plain array
+# arithmetic, and every per-chain mean comes out of np.bincount over the
+# codes, so there are no row-wise axis=1 reductions on mixed-dtype frames.
+# Non-finite values (NaN and +-inf) are skipped everywhere; streaming and
+# incremental aggregates follow the same rule.
+import numpy as np
+import pandas as pd
+
+from .data import FEATURE_COLUMNS, VOLUME_COLUMNS
+from .instrument import traced
+
+
+# Coefficient of variation across the finite volume windows of each row
+# (sample std / mean; unlike DataFrame.std(axis=1), an inf window is skipped
+# rather than turning the row into NaN)
+def volume_cv(volumes):
+    volumes = np.asarray(volumes, dtype=np.float64)
+    columns = [volumes[:, j] for j in range(volumes.shape[1])]
+    finite = [np.isfinite(col) for col in columns]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if all(mask.all() for mask in finite):
+            n = len(columns)
+            mean = sum(columns) / n
+            squares = sum((col - mean) ** 2 for col in columns)
+        else:
+            n = sum(mask.astype(np.int64) for mask in finite)
+            mean = sum(np.where(mask, col, 0.0) for col, mask in zip(columns, finite)) / n
+            squares = sum(np.where(mask, (col - mean) ** 2, 0.0) for col, mask in zip(columns, finite))
+        cv = np.sqrt(squares / (n - 1)) / mean
+    cv[~np.isfinite(cv)] = np.nan
+    return cv
+
+
+# Mean of the finite values (NaN and +-inf skipped) of every column of
+# `matrix` per group code
+def grouped_means(codes, matrix, n_groups):
+    sizes = np.bincount(codes, minlength=n_groups)
+    means = np.empty((n_groups, matrix.shape[1]), dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for j in range(matrix.shape[1]):
+            col = matrix[:, j]
+            finite = np.isfinite(col)
+            if finite.all():
+                means[:, j] = np.bincount(codes, weights=col, minlength=n_groups) / sizes
+            else:
+                kept = codes[finite]
+                means[:, j] = np.bincount(kept, weights=col[finite], minlength=n_groups) / np.bincount(kept, minlength=n_groups)
+    return means
+
+
+# Integer chain codes and the sorted chain labels. Categorical labels reuse
+# their codes, renumbered so the labels come out sorted as with factorize.
+def chain_codes(labels):
+    if not isinstance(labels.dtype, pd.CategoricalDtype):
+        return pd.factorize(labels, sort=True)
+    codes = labels.cat.codes.to_numpy()
+    categories = labels.cat.categories
+    used = np.bincount(codes[codes >= 0], minlength=len(categories)) > 0
+    rank, chains = pd.factorize(categories[used], sort=True)
+    # Unused categories and the -1 of missing labels map to -1 (last entry)
+    mapping = np.full(len(categories) + 1, -1, dtype=np.int64)
+    mapping[:-1][used] = rank
+    return mapping[codes], chains
+
+
+# chain_aggregates from the cleaned, unified frame: per-chain means of the
+# metrics, project count, volume volatility index and 7d volume/liquidity
+# ratio, plus the liquidity-to-average-volume ratio
+@traced()
+def chain_features(data):
+    codes, chains = chain_codes(data['chain'])
+    mean_columns = [col for col in FEATURE_COLUMNS if col != 'volume_std']
+    # Column-major so each metric is one contiguous array
+    matrix = np.empty((len(data), len(FEATURE_COLUMNS)), dtype=np.float64, order='F')
+    for col in mean_columns:
+        matrix[:, FEATURE_COLUMNS.index(col)] = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    volume_idx = [FEATURE_COLUMNS.index(col) for col in VOLUME_COLUMNS]
+    matrix[:, FEATURE_COLUMNS.index('volume_std')] = volume_cv(matrix[:, volume_idx])
+
+    # Rows without a chain label are left out, as groupby does
+    valid = codes >= 0
+    if not valid.all():
+        codes, matrix = codes[valid], matrix[valid]
+    means = grouped_means(codes, matrix, len(chains))
+    chain_aggregates = pd.DataFrame(means, columns=FEATURE_COLUMNS)
+    chain_aggregates.insert(0, 'chain', np.asarray(chains, dtype=object))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        chain_aggregates['liquidity_ratio'] = means[:, FEATURE_COLUMNS.index('usd_liquidity')] / means[:, volume_idx].mean(axis=1)
+    return chain_aggregates
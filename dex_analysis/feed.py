@@ -0,0 +1,112 @@
+# Local stand-in for the snapshot feed
+#
+# Serves the dex_pairs_<chain>.csv files of a directory over HTTP with ETag
+# and Last-Modified headers (and 304 answers to conditional requests), so
+# dex_analysis.fetch can be run and tested offline. --delay adds latency
+# per response and --fail-rate answers a share of requests with 503, to
+# exercise concurrency and retries.
+#
+#   python -m dex_analysis.feed --data-dir dex_data --port 8765
+#   python -m dex_analysis fetch --base-url http://localhost:8765 --data-dir /tmp/dex_data
+import argparse
+import email.utils
+import os
+import random
+import re
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SNAPSHOT_PATH = re.compile(r'^/(dex_pairs_[A-Za-z0-9_-]+\.csv)$')
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    # Set on the server: data_dir, delay, fail_rate, quiet
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _respond(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if status != 200:
+            self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        match = SNAPSHOT_PATH.match(self.path.split('?', 1)[0])
+        path = os.path.join(self.server.data_dir, match.group(1)) if match else None
+        if path is None or not os.path.isfile(path):
+            return self._respond(404)
+        if random.random() < self.server.fail_rate:
+            return self._respond(503, [('Retry-After', '0')])
+
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        validators = [('ETag', etag), ('Last-Modified', last_modified)]
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            if etag in [tag.strip() for tag in if_none_match.split(',')]:
+                return self._respond(304, validators)
+        elif if_modified_since is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                since = None
+            if since is not None and int(stat.st_mtime) <= since:
+                return self._respond(304, validators)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(stat.st_size))
+        for name, value in validators:
+            self.send_header(name, value)
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+def make_server(data_dir, host='127.0.0.1', port=8765, delay=0.0, fail_rate=0.0, quiet=False):
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    server.daemon_threads = True
+    server.data_dir, server.delay, server.fail_rate, server.quiet = data_dir, delay, fail_rate, quiet
+    return server
+
+
+# Serve in a background thread (port=0 picks a free port); returns (server, base_url).
+# Stop with server.shutdown().
+def start_feed(data_dir, host='127.0.0.1', port=0, **options):
+    server = make_server(data_dir, host, port, quiet=True, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a directory of dex_pairs_<chain>.csv snapshots over HTTP.')
+    parser.add_argument('--data-dir', default='dex_data')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds of latency added to every response')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of requests answered with 503')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.data_dir, args.host, args.port, args.delay, args.fail_rate)
+    print(f'serving {os.path.abspath(args.data_dir)} at http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
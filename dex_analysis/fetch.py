@@ -0,0 +1,185 @@
+# Concurrent download of the per-chain snapshots into the dex_data layout
+#
+# Every chain's dex_pairs_<chain>.csv is requested at the same time over one
+# pooled aiohttp session, so a refresh takes about as long as the slowest
+# chain. Requests to the same host share a token-bucket rate limit, failed
+# requests (connection errors, 429, 5xx) are retried with exponential
+# backoff, and the ETag / Last-Modified of the previous download are sent
+# back so unchanged snapshots cost a 304. Bodies are streamed to a temporary
+# file and moved into place, so readers never see a partial CSV.
+#
+#     results = fetch_snapshots('http://localhost:8765', 'dex_data')
+#
+# dex_analysis.feed serves a directory of snapshots the same way for
+# offline runs.
+import asyncio
+import os
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from . import cache
+from .data import CHAINS, chain_path
+from .instrument import traced
+
+STATE_FILENAME = 'fetch_state.json'
+URL_TEMPLATE = '{base_url}/dex_pairs_{chain}.csv'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# status: 'updated', 'not_modified' or 'failed'
+FetchResult = namedtuple('FetchResult', ['chain', 'status', 'bytes', 'seconds', 'attempts', 'error'])
+
+
+class FetchError(Exception):
+    pass
+
+
+# Token bucket: `rate` requests per second with bursts of up to `burst`
+class RateLimiter:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def chain_urls(base_url, chains=None, template=URL_TEMPLATE):
+    return {chain: template.format(base_url=base_url.rstrip('/'), chain=chain) for chain in (chains or CHAINS)}
+
+
+def state_path(data_dir):
+    return os.path.join(data_dir, cache.CACHE_DIRNAME, STATE_FILENAME)
+
+
+# Validators of the previous download, only if the file is still the one we wrote
+def _conditional_headers(entry, file_path):
+    if not entry or not os.path.exists(file_path) or cache.match_fingerprint(file_path, entry.get('fingerprint')) is None:
+        return {}
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def _retry_delay(attempt, backoff, retry_after=None):
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return backoff * 2 ** attempt * (0.5 + random.random() / 2)
+
+
+async def _download(session, url, file_path, headers, chunk_size):
+    import aiohttp
+
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304:
+            return response, 0
+        if response.status in RETRY_STATUSES:
+            raise FetchError(f'HTTP {response.status}', response.headers.get('Retry-After'))
+        if response.status != 200:
+            raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status,
+                                              message=response.reason)
+        tmp_path = cache.temp_path(file_path)
+        written = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                async for block in response.content.iter_chunked(chunk_size):
+                    f.write(block)
+                    written += len(block)
+            if response.content_length is not None and written != response.content_length:
+                raise FetchError(f'truncated body: {written} of {response.content_length} bytes')
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return response, written
+
+
+async def fetch_chain(session, chain, url, file_path, limiter, entry, retries=3, backoff=0.5, chunk_size=1 << 16):
+    import aiohttp
+
+    start = time.perf_counter()
+    error = None
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        try:
+            response, written = await _download(session, url, file_path, _conditional_headers(entry, file_path),
+                                                chunk_size)
+        except FetchError as exc:
+            error = exc
+            retry_after = exc.args[1] if len(exc.args) > 1 else None
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as exc:
+            error, retry_after = exc, None
+        except aiohttp.ClientResponseError as exc:
+            # Other 4xx: retrying will not help
+            return FetchResult(chain, 'failed', 0, time.perf_counter() - start, attempt + 1, str(exc)), entry
+        else:
+            if response.status == 304:
+                return FetchResult(chain, 'not_modified', 0, time.perf_counter() - start, attempt + 1, None), entry
+            entry = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fingerprint': cache.fingerprint(file_path)
+            }
+            return FetchResult(chain, 'updated', written, time.perf_counter() - start, attempt + 1, None), entry
+        if attempt < retries:
+            await asyncio.sleep(_retry_delay(attempt, backoff, retry_after))
+    message = str(error.args[0]) if isinstance(error, FetchError) else repr(error)
+    return FetchResult(chain, 'failed', 0, time.perf_counter() - start, retries + 1, message), entry
+
+
+# Fetch {chain: url} into data_dir; rate_limits maps a host to requests per
+# second (default_rate for other hosts). Returns {chain: FetchResult}.
+async def fetch_urls(urls, data_dir, rate_limits=None, default_rate=10.0, burst=None, retries=3, backoff=0.5,
+                     timeout=300, max_connections=16):
+    import aiohttp
+
+    os.makedirs(data_dir, exist_ok=True)
+    state = cache.read_json(state_path(data_dir)) or {}
+    rate_limits = rate_limits or {}
+    limiters = {}
+    for url in urls.values():
+        host = urlsplit(url).netloc
+        if host not in limiters:
+            rate = rate_limits.get(host, default_rate)
+            limiters[host] = RateLimiter(rate, burst or max(1, int(rate)))
+
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        tasks = [fetch_chain(session, chain, url, chain_path(data_dir, chain), limiters[urlsplit(url).netloc],
+                             state.get(chain), retries, backoff)
+                 for chain, url in urls.items()]
+        outcomes = await asyncio.gather(*tasks)
+
+    results = {}
+    for result, entry in outcomes:
+        results[result.chain] = result
+        if entry is not None:
+            state[result.chain] = entry
+    os.makedirs(os.path.dirname(state_path(data_dir)), exist_ok=True)
+    cache.write_json(state_path(data_dir), state)
+    return results
+
+
+# Blocking entry point: fetch every chain from base_url into data_dir
+@traced(rows=len)
+def fetch_snapshots(base_url, data_dir, chains=None, template=URL_TEMPLATE, **options):
+    return asyncio.run(fetch_urls(chain_urls(base_url, chains, template), data_dir, **options))
@@ -0,0 +1,101 @@
+# Per-chain figure payloads for the trading volume/liquidity dashboard
+#
+# The volume and liquidity figures of a chain only change when that chain's
+# data does, so they are built once (downsampled to a pixel budget, with
+# plain lists instead of pandas objects), kept in a small LRU cache and
+# served by lookup. The JSON serialization of each payload is memoized
+# alongside it.
+import json
+import threading
+from collections import OrderedDict
+
+from .downsample import DEFAULT_POINTS, downsample
+from .instrument import traced
+
+
+# Downsampled trace of one column, as plain lists with None for gaps
+# (NaN is not valid JSON)
+def _trace(data, column, name, max_points):
+    series = downsample(data[column], max_points)
+    y = series.astype(object).where(series.notna(), None).tolist()
+    return {'x': series.index.tolist(), 'y': y, 'type': 'line', 'name': name}
+
+
+@traced(rows=None)
+def volume_figure(data, max_points=DEFAULT_POINTS):
+    return {
+        'data': [
+            _trace(data, 'one_day_volume', 'Daily Volume', max_points),
+            _trace(data, 'seven_day_volume', 'Weekly Volume', max_points),
+            _trace(data, 'thirty_day_volume', 'Monthly Volume', max_points)
+        ],
+        'layout': {'title': 'Trading Volumes'}
+    }
+
+
+@traced(rows=None)
+def liquidity_figure(data, max_points=DEFAULT_POINTS):
+    return {
+        'data': [_trace(data, 'usd_liquidity', 'USD Liquidity', max_points)],
+        'layout': {'title': 'USD Liquidity'}
+    }
+
+
+class FigureCache:
+    # loader(chain) -> DataFrame; version(chain) -> any value that changes with
+    # the chain's data (e.g. a file fingerprint), or None for static data;
+    # max_points caps every trace (None sends all rows)
+    def __init__(self, loader, version=None, maxsize=32, max_points=DEFAULT_POINTS):
+        self.loader = loader
+        self.max_points = max_points
+        self.version = version
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, chain):
+        version = self.version(chain) if self.version is not None else None
+        with self._lock:
+            entry = self._entries.get(chain)
+            if entry is not None and entry['version'] == version:
+                self._entries.move_to_end(chain)
+                return entry
+        data = self.loader(chain)
+        figures = (volume_figure(data, self.max_points), liquidity_figure(data, self.max_points))
+        entry = {'version': version, 'figures': figures, 'json': None}
+        with self._lock:
+            self._entries[chain] = entry
+            self._entries.move_to_end(chain)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    # (volume_fig, liquidity_fig) for a chain
+    def get(self, chain):
+        return self._entry(chain)['figures']
+
+    # Serialized {"volume": ..., "liquidity": ...} payload for a chain
+    def get_json(self, chain):
+        entry = self._entry(chain)
+        if entry['json'] is None:
+            volume_fig, liquidity_fig = entry['figures']
+            entry['json'] = json.dumps({'volume': volume_fig, 'liquidity': liquidity_fig})
+        return entry['json']
+
+    # Build the payloads of `chains` up front, e.g. at dashboard startup
+    def warm(self, chains):
+        for chain in chains:
+            self._entry(chain)
+
+    def invalidate(self, chain=None):
+        with self._lock:
+            if chain is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(chain, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, chain):
+        return chain in self._entries
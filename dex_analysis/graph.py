@@ -0,0 +1,194 @@
+# Token liquidity graphs per chain (scipy.sparse)
+#
+# Every chain becomes an undirected token-by-token adjacency matrix in CSR
+# form whose entries are the summed usd_liquidity of the pairs between two
+# tokens. Token IDs come from the shared AddressIndex, so the same address
+# is the same token on every chain; each chain's matrix only spans the
+# tokens it trades (graph.tokens maps local rows to global IDs). Components,
+# hub rankings and routes run on the sparse matrices through
+# scipy.sparse.csgraph; nothing is densified.
+#
+#     index, graphs = build_graphs(dex_datasets)
+#     hub_tokens(graphs['ethereum'], index)
+#     route(graphs['ethereum'], index, usdc, pepe)
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+
+from .addresses import AddressIndex, encode_tokens
+from .instrument import traced
+
+
+class TokenGraph:
+    def __init__(self, chain, tokens, adjacency, pair_count):
+        self.chain = chain
+        # Global token ID of every local node
+        self.tokens = tokens
+        # Symmetric CSR matrix of pooled liquidity between local nodes
+        self.adjacency = adjacency
+        self.pair_count = pair_count
+        self._spanning_tree = None
+
+    def __len__(self):
+        return len(self.tokens)
+
+    @property
+    def edge_count(self):
+        return self.adjacency.nnz // 2
+
+    # Local node of each global token ID, -1 for tokens not on this chain
+    def local(self, token_ids):
+        token_ids = np.asarray(token_ids)
+        positions = np.searchsorted(self.tokens, token_ids)
+        positions = np.minimum(positions, max(len(self.tokens) - 1, 0))
+        found = (len(self.tokens) > 0) & (self.tokens[positions] == token_ids)
+        return np.where(found, positions, -1)
+
+    # Edge costs 1/liquidity: shortest paths prefer deep pools, and the
+    # minimum spanning tree of the costs is the maximum-liquidity spanning tree
+    def costs(self):
+        costs = self.adjacency.copy()
+        costs.data = 1.0 / costs.data
+        return costs
+
+    # Maximum-liquidity spanning forest; the path between two tokens in it is
+    # the route with the largest bottleneck (widest path)
+    @property
+    def spanning_tree(self):
+        if self._spanning_tree is None:
+            tree = csgraph.minimum_spanning_tree(self.costs())
+            tree = tree + tree.T
+            tree.data = 1.0 / tree.data
+            self._spanning_tree = tree.tocsr()
+        return self._spanning_tree
+
+
+# Symmetric liquidity adjacency of pairs (token_a, token_b, usd_liquidity);
+# returns (global token IDs of the nodes, CSR matrix). Self-pairs and pairs
+# without positive, finite liquidity are left out.
+def liquidity_adjacency(token_a, token_b, liquidity):
+    liquidity = np.asarray(liquidity, dtype=np.float64)
+    keep = (token_a != token_b) & (token_a >= 0) & (token_b >= 0) & np.isfinite(liquidity) & (liquidity > 0)
+    token_a, token_b, liquidity = token_a[keep], token_b[keep], liquidity[keep]
+    tokens, local = np.unique(np.concatenate([token_a, token_b]), return_inverse=True)
+    rows, cols = local[:len(token_a)], local[len(token_a):]
+    # Duplicate pairs (and both orientations) are summed by the COO -> CSR conversion
+    adjacency = sp.coo_matrix((np.concatenate([liquidity, liquidity]),
+                               (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+                              shape=(len(tokens), len(tokens))).tocsr()
+    return tokens.astype(np.int32), adjacency
+
+
+# One TokenGraph per chain from encoded pairs (encode_tokens) and the
+# pairs' usd_liquidity in the same row order
+@traced(rows=lambda graphs: sum(graph.pair_count for graph in graphs.values()))
+def chain_graphs(encoded, liquidity, chains):
+    liquidity = np.asarray(liquidity, dtype=np.float64)
+    order = np.argsort(encoded.chain, kind='stable')
+    offsets = np.searchsorted(encoded.chain[order], np.arange(len(chains) + 1))
+    graphs = {}
+    for code, chain in enumerate(chains):
+        rows = order[offsets[code]:offsets[code + 1]]
+        tokens, adjacency = liquidity_adjacency(encoded.token_a[rows], encoded.token_b[rows], liquidity[rows])
+        graphs[chain] = TokenGraph(chain, tokens, adjacency, len(rows))
+    return graphs
+
+
+# (AddressIndex, {chain: TokenGraph}) from {chain: pairs DataFrame}. Only
+# the token address and usd_liquidity columns are read; pass the index of
+# build_address_index to share its token IDs, otherwise a new one is built.
+# Pairs with a missing token address are left out.
+def build_graphs(datasets, index=None):
+    index = index if index is not None else AddressIndex()
+    encoded = encode_tokens(datasets, index)
+    chains = list(datasets)
+    liquidity = np.concatenate([data['usd_liquidity'].to_numpy(dtype=np.float64, na_value=np.nan)
+                                for data in datasets.values()])
+    return index, chain_graphs(encoded, liquidity, chains)
+
+
+# Component label of every node, and one row per component (largest first)
+# with its token count, pair edges and pooled liquidity
+def components(graph):
+    n_components, labels = csgraph.connected_components(graph.adjacency, directed=False)
+    sizes = np.bincount(labels, minlength=n_components)
+    # Every undirected edge is stored twice; attribute each copy to its row's component
+    row_labels = np.repeat(labels, np.diff(graph.adjacency.indptr))
+    edges = np.bincount(row_labels, minlength=n_components) // 2
+    liquidity = np.bincount(row_labels, weights=graph.adjacency.data, minlength=n_components) / 2
+    summary = pd.DataFrame({'component': np.arange(n_components), 'tokens': sizes, 'edges': edges,
+                            'usd_liquidity': liquidity})
+    summary = summary.sort_values(['usd_liquidity', 'tokens'], ascending=False, kind='stable').reset_index(drop=True)
+    return labels, summary
+
+
+# The k tokens with the most pooled liquidity (weighted degree), with their
+# number of distinct counterparties and share of the chain's liquidity
+def hub_tokens(graph, index, k=10):
+    degree = np.diff(graph.adjacency.indptr)
+    strength = np.asarray(graph.adjacency.sum(axis=1)).ravel()
+    k = min(k, len(strength))
+    if k == 0:
+        return pd.DataFrame(columns=['address', 'counterparties', 'usd_liquidity', 'liquidity_share'])
+    best = np.argpartition(-strength, k - 1)[:k]
+    best = best[np.argsort(-strength[best], kind='stable')]
+    total = strength.sum() / 2
+    return pd.DataFrame({
+        'address': index.decode(graph.tokens[best]),
+        'counterparties': degree[best],
+        'usd_liquidity': strength[best],
+        'liquidity_share': strength[best] / total if total else np.nan
+    })
+
+
+# Routes from one token to every other token of its chain, as local
+# predecessor arrays (-9999 where unreachable). method='widest' maximizes the
+# thinnest hop's liquidity (paths in the maximum-liquidity spanning tree);
+# method='cost' minimizes the sum of 1/liquidity over the hops (Dijkstra).
+def routes_from(graph, source, method='widest'):
+    if method == 'widest':
+        _, predecessors = csgraph.breadth_first_order(graph.spanning_tree, source, directed=False,
+                                                      return_predecessors=True)
+    elif method == 'cost':
+        _, predecessors = csgraph.dijkstra(graph.costs(), directed=False, indices=source, return_predecessors=True)
+    else:
+        raise ValueError(f"unknown method {method!r}, expected 'widest' or 'cost'")
+    return predecessors
+
+
+# Best route between two token addresses: one row per hop with the pooled
+# liquidity of that hop; empty when either token is missing or unreachable
+def route(graph, index, source, target, method='widest'):
+    source_node, target_node = graph.local(index.lookup([source, target]))
+    columns = ['from_address', 'to_address', 'usd_liquidity']
+    if source_node < 0 or target_node < 0:
+        return pd.DataFrame(columns=columns)
+    predecessors = routes_from(graph, source_node, method)
+    path = [target_node]
+    while path[-1] != source_node:
+        previous = predecessors[path[-1]]
+        if previous < 0:
+            return pd.DataFrame(columns=columns)
+        path.append(previous)
+    path = np.asarray(path[::-1])
+    hops_from, hops_to = path[:-1], path[1:]
+    liquidity = np.asarray(graph.adjacency[hops_from, hops_to]).ravel()
+    return pd.DataFrame({
+        'from_address': index.decode(graph.tokens[hops_from]),
+        'to_address': index.decode(graph.tokens[hops_to]),
+        'usd_liquidity': liquidity
+    })
+
+
+# Chains x chains count of shared tokens (diagonal: tokens per chain), from a
+# sparse chain-by-token incidence matrix
+def token_overlap(graphs):
+    chains = list(graphs)
+    n_tokens = max((int(graph.tokens.max()) + 1 for graph in graphs.values() if len(graph)), default=0)
+    rows = np.concatenate([np.full(len(graph), code) for code, graph in enumerate(graphs.values())]) \
+        if chains else np.empty(0, dtype=np.int64)
+    cols = np.concatenate([graph.tokens for graph in graphs.values()]) if chains else np.empty(0, dtype=np.int64)
+    incidence = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(chains), n_tokens))
+    overlap = (incidence @ incidence.T).toarray().astype(np.int64)
+    return pd.DataFrame(overlap, index=chains, columns=chains)
@@ -0,0 +1,224 @@
+# Dated snapshot history with delta ingestion
+#
+# Each dex_pairs_<chain>.csv dump is ingested as the snapshot of one date,
+# but only pairs that are new, changed or gone since the previous snapshot
+# are written. Pairs are keyed by their (normalized) token addresses,
+# falling back to token_pair when an address is missing. Layout:
+#
+#     <root>/<chain>/manifest.json          dates, source fingerprints, totals
+#     <root>/<chain>/latest.parquet         full state after the last snapshot
+#     <root>/<chain>/<YYYY-MM-DD>.parquet   delta rows of that snapshot
+#
+# Delta files are sorted by pair_key and written in small row groups, so
+# reading one pair's series only decodes the row group that holds it in
+# each file (Parquet statistics), never the full history.
+#
+#     store = HistoryStore.for_data_dir('dex_data')
+#     store.ingest('bnb', 'dex_data/dex_pairs_bnb.csv', '2024-05-09')
+#     store.series('bnb', key)
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import cache
+from .addresses import normalize_addresses
+from .data import ADDRESS_COLUMNS, METRIC_COLUMNS
+from .instrument import traced
+from .listcols import list_counts
+
+HISTORY_DIRNAME = 'history'
+LATEST_FILENAME = 'latest.parquet'
+MANIFEST_FILENAME = 'manifest.json'
+ROW_GROUP_SIZE = 4096
+
+# Values tracked per pair; a pair is re-written when any of them changes
+VALUE_COLUMNS = METRIC_COLUMNS + ['seven_day_volume_liquidity_ratio', 'project_count']
+STATE_COLUMNS = ['pair_key', 'token_pair'] + ADDRESS_COLUMNS + VALUE_COLUMNS
+# Per-snapshot totals kept in the manifest (chain-level history without reading deltas)
+TOTAL_COLUMNS = ['one_day_volume', 'seven_day_volume', 'thirty_day_volume', 'usd_liquidity']
+
+
+# 'token_a:token_b' from normalized addresses, 'pair:<token_pair>' when one is missing
+def _keys(token_a, token_b, token_pair):
+    token_a, token_b = (pd.Series(np.asarray(values, dtype=object)) for values in (token_a, token_b))
+    keys = token_a + ':' + token_b
+    missing = (token_a == '') | (token_b == '')
+    fallback = 'pair:' + pd.Series(np.asarray(token_pair, dtype=object)).fillna('')
+    return keys.where(~missing, fallback).to_numpy(dtype=object)
+
+
+# Key of every row of a snapshot frame
+def pair_keys(data):
+    return _keys(normalize_addresses(data['token_a_address']), normalize_addresses(data['token_b_address']),
+                 data['token_pair'].to_numpy(dtype=object))
+
+
+# Keyed state of one snapshot; repeated keys get a '#<n>' suffix in file order
+def snapshot_state(data):
+    state = pd.DataFrame(index=data.index)
+    for col in ADDRESS_COLUMNS:
+        state[col] = normalize_addresses(data[col])
+    state.insert(0, 'pair_key', _keys(state['token_a_address'], state['token_b_address'],
+                                      data['token_pair'].to_numpy(dtype=object)))
+    state.insert(1, 'token_pair', data['token_pair'].to_numpy(dtype=object))
+    for col in METRIC_COLUMNS + ['seven_day_volume_liquidity_ratio']:
+        state[col] = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    state['project_count'] = list_counts(data['projects']).to_numpy(dtype=np.int64)
+    repeat = state.groupby('pair_key', sort=False).cumcount().to_numpy()
+    if repeat.any():
+        suffix = np.where(repeat > 0, np.char.add('#', repeat.astype(str)), '')
+        state['pair_key'] = (state['pair_key'] + suffix.astype(object)).astype(object)
+    return state.sort_values('pair_key', kind='stable').reset_index(drop=True)
+
+
+# Rows of `current` that are new or differ from `previous`, plus tombstones
+# (removed=True, values NaN) for keys that disappeared
+def delta(previous, current):
+    previous = previous.assign(pair_key=previous['pair_key'].to_numpy(dtype=object))
+    merged = current.merge(previous[['pair_key'] + VALUE_COLUMNS], on='pair_key', how='left',
+                           suffixes=('', '_previous'), indicator=True)
+    changed = (merged['_merge'] == 'left_only').to_numpy(copy=True)
+    for col in VALUE_COLUMNS:
+        new, old = merged[col].to_numpy(dtype=np.float64), merged[f'{col}_previous'].to_numpy(dtype=np.float64)
+        # NaN -> NaN is not a change
+        changed |= (new != old) & ~(np.isnan(new) & np.isnan(old))
+    rows = current[changed].assign(removed=False)
+    gone = previous[pd.Index(current['pair_key']).get_indexer(previous['pair_key']) < 0]
+    tombstones = gone[['pair_key', 'token_pair'] + ADDRESS_COLUMNS].assign(
+        **{col: np.nan for col in VALUE_COLUMNS}, removed=True)
+    result = pd.concat([rows, tombstones[rows.columns]], ignore_index=True)
+    return result.sort_values('pair_key', kind='stable').reset_index(drop=True)
+
+
+def _write_parquet(frame, path):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    cache.replace_atomic(path, lambda tmp_path: pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE))
+
+
+class HistoryStore:
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def for_data_dir(cls, data_dir):
+        return cls(os.path.join(data_dir, HISTORY_DIRNAME))
+
+    def _chain_dir(self, chain):
+        return os.path.join(self.root, chain)
+
+    def _delta_path(self, chain, date):
+        return os.path.join(self._chain_dir(chain), f'{date}.parquet')
+
+    def manifest(self, chain):
+        return cache.read_json(os.path.join(self._chain_dir(chain), MANIFEST_FILENAME)) or {'snapshots': []}
+
+    def chains(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(chain for chain in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self._chain_dir(chain), MANIFEST_FILENAME)))
+
+    def dates(self, chain):
+        return [entry['date'] for entry in self.manifest(chain)['snapshots']]
+
+    def latest(self, chain):
+        path = os.path.join(self._chain_dir(chain), LATEST_FILENAME)
+        return pq.read_table(path).to_pandas() if os.path.exists(path) else pd.DataFrame(columns=STATE_COLUMNS)
+
+    # Ingest one dump as the snapshot of `date` (YYYY-MM-DD, default: the
+    # file's modification date). Returns the manifest entry, or None when the
+    # same file was already ingested. Dates must be ingested in order.
+    @traced(rows=lambda entry: entry['changed'] if entry else 0)
+    def ingest(self, chain, file_path, date=None):
+        if date is None:
+            date = datetime.datetime.fromtimestamp(os.path.getmtime(file_path), datetime.timezone.utc).date()
+        date = pd.Timestamp(date).date().isoformat()
+        manifest = self.manifest(chain)
+        last = manifest['snapshots'][-1] if manifest['snapshots'] else None
+        if last is not None:
+            if cache.match_fingerprint(file_path, last['fingerprint']) is not None:
+                return None
+            if date <= last['date']:
+                raise ValueError(f'{chain} already has a snapshot for {last["date"]}; '
+                                 f'snapshots must be ingested in date order (got {date})')
+
+        fingerprint = cache.fingerprint(file_path)
+        data = cache.load_data(file_path, columns=['token_pair', 'projects'] + ADDRESS_COLUMNS + METRIC_COLUMNS +
+                               ['seven_day_volume_liquidity_ratio'])
+        current = snapshot_state(data)
+        changes = delta(self.latest(chain), current)
+
+        os.makedirs(self._chain_dir(chain), exist_ok=True)
+        _write_parquet(changes, self._delta_path(chain, date))
+        _write_parquet(current, os.path.join(self._chain_dir(chain), LATEST_FILENAME))
+        entry = {
+            'date': date,
+            'fingerprint': fingerprint,
+            'pairs': len(current),
+            'changed': int((~changes['removed']).sum()),
+            'removed': int(changes['removed'].sum()),
+            'totals': {col: float(np.nansum(current[col])) for col in TOTAL_COLUMNS}
+        }
+        manifest['snapshots'].append(entry)
+        cache.write_json(os.path.join(self._chain_dir(chain), MANIFEST_FILENAME), manifest)
+        return entry
+
+    # Ingest {chain: path} for one date; returns {chain: entry or None}
+    def ingest_all(self, file_paths, date=None):
+        return {chain: self.ingest(chain, file_path, date) for chain, file_path in dict(file_paths).items()}
+
+    # Chain totals and pair counts per snapshot date, from the manifest alone
+    def chain_totals(self, chain):
+        snapshots = self.manifest(chain)['snapshots']
+        totals = pd.DataFrame([dict(entry['totals'], pairs=entry['pairs']) for entry in snapshots],
+                              index=pd.DatetimeIndex([entry['date'] for entry in snapshots], name='date'))
+        return totals
+
+    # Values of one pair at every snapshot date (NaN before it appears and
+    # after it is removed), reading only the matching row group of each delta
+    def series(self, chain, key, columns=None):
+        columns = list(columns or VALUE_COLUMNS)
+        dates = self.dates(chain)
+        rows = []
+        for date in dates:
+            table = pq.read_table(self._delta_path(chain, date), columns=columns + ['removed'],
+                                  filters=[('pair_key', '==', key)])
+            if table.num_rows:
+                rows.append(table.slice(table.num_rows - 1).to_pandas().assign(date=date))
+        index = pd.DatetimeIndex(dates, name='date')
+        if not rows:
+            return pd.DataFrame(np.nan, index=index, columns=columns)
+        changes = pd.concat(rows, ignore_index=True)
+        changes.index = pd.DatetimeIndex(changes.pop('date'), name='date')
+        # Carry each written state forward until the next change; a removal
+        # carries NaN forward
+        state = changes.reindex(index).ffill()
+        removed = state.pop('removed')
+        return state.where(removed.eq(False))
+
+    # Keys of the pairs currently listed under a token_pair symbol
+    def find_keys(self, chain, token_pair):
+        latest = self.latest(chain)
+        return latest.loc[latest['token_pair'] == token_pair, 'pair_key'].tolist()
+
+    # Full state of a chain at `date`, replaying the deltas up to that date
+    def snapshot(self, chain, date):
+        date = pd.Timestamp(date).date().isoformat()
+        state = None
+        for snapshot_date in self.dates(chain):
+            if snapshot_date > date:
+                break
+            changes = pq.read_table(self._delta_path(chain, snapshot_date)).to_pandas()
+            if state is None:
+                state = changes
+            else:
+                state = pd.concat([state[~state['pair_key'].isin(changes['pair_key'])], changes], ignore_index=True)
+        if state is None:
+            return pd.DataFrame(columns=STATE_COLUMNS)
+        state = state[~state['removed']].drop(columns='removed')
+        state['project_count'] = state['project_count'].astype(np.int64)
+        return state.sort_values('pair_key', kind='stable').reset_index(drop=True)
@@ -0,0 +1,70 @@
+# Incremental chain_aggregates with a persistent per-chain partial store
+#
+# For every snapshot the store keeps the source file's fingerprint and that
+# chain's partial moments over the finite values (count, mean, M2 per metric;
+# sums and sums of squares follow from them). A refresh recomputes only the chains whose file
+# fingerprint changed and merges all partials into chain_aggregates, so a
+# new dex_pairs_solana.csv costs one chain's work instead of all of them.
+import os
+
+from . import cache
+from .data import FEATURE_COLUMNS
+from .streaming import DEFAULT_CHUNKSIZE, ChainMoments, chain_aggregates_from_moments, stream_moments
+
+STORE_FILENAME = 'chain_aggregates.json'
+
+
+class AggregateStore:
+    def __init__(self, path):
+        self.path = path
+        self.entries = cache.read_json(path) or {}
+
+    # Store kept in the data directory's cache folder
+    @classmethod
+    def for_data_dir(cls, data_dir):
+        return cls(os.path.join(data_dir, cache.CACHE_DIRNAME, STORE_FILENAME))
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        cache.write_json(self.path, self.entries)
+
+    # Recompute the chains of {chain: path} whose file changed (or is new) and
+    # drop stored chains that are no longer listed. Returns the recomputed chains.
+    def refresh(self, file_paths, chunksize=DEFAULT_CHUNKSIZE):
+        file_paths = dict(file_paths)
+        changed = []
+        for chain, file_path in file_paths.items():
+            entry = self.entries.get(chain) or {}
+            matched = cache.match_fingerprint(file_path, entry.get('fingerprint'))
+            # Partials written for a different set of feature columns are stale too
+            if matched is not None and entry['moments']['columns'] == FEATURE_COLUMNS:
+                entry['fingerprint'] = matched
+                continue
+            fingerprint = cache.fingerprint(file_path)
+            moments = stream_moments([file_path], chunksize)
+            self.entries[chain] = {'fingerprint': fingerprint, 'moments': moments.to_dict()}
+            changed.append(chain)
+        for chain in set(self.entries) - set(file_paths):
+            del self.entries[chain]
+        self.save()
+        return changed
+
+    # Merge of all stored per-chain partials
+    def moments(self):
+        merged = ChainMoments()
+        for entry in self.entries.values():
+            merged.merge(ChainMoments.from_dict(entry['moments']))
+        return merged
+
+    def chain_aggregates(self):
+        return chain_aggregates_from_moments(self.moments())
+
+
+# Refresh the store for {chain: path} and return (chain_aggregates, recomputed chains)
+def refresh_chain_aggregates(file_paths, store=None, chunksize=DEFAULT_CHUNKSIZE):
+    file_paths = dict(file_paths)
+    if store is None:
+        data_dir = os.path.dirname(os.path.abspath(next(iter(file_paths.values()))))
+        store = AggregateStore.for_data_dir(data_dir)
+    changed = store.refresh(file_paths, chunksize)
+    return store.chain_aggregates(), changed
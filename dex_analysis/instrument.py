@@ -0,0 +1,219 @@
+# Stage-level instrumentation for the analysis pipeline
+#
+# Pipeline steps report themselves as named stages, either with the
+# `stage(...)` context manager or the `@traced(...)` decorator. Nothing is
+# measured unless a Tracer is active; then every stage produces a record
+# with wall time, rows processed and peak memory, which is passed to the
+# tracer's hooks and collected into a per-run JSON trace. Optional modes add
+# tracemalloc peaks (trace_memory=True) and a cProfile summary of each
+# top-level stage (profile=True).
+#
+#     with Tracer(output='trace.json', hooks=[PrintHook()]):
+#         data = load_data(path)
+#
+# Stages that run inside worker processes (dex_analysis.parallel) are not
+# seen by the parent's tracer; only the enclosing call is.
+import cProfile
+import datetime
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+_active = None
+
+
+# Peak resident set size of this process; `resource` only exists on Unix,
+# elsewhere psutil's peak working set is used if installed, otherwise None
+def maxrss_bytes():
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def _rows(value):
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+# Hook interface: a hook may implement start(name, depth) and/or end(record)
+class Hook:
+    def start(self, name, depth):
+        pass
+
+    def end(self, record):
+        pass
+
+
+class PrintHook(Hook):
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def end(self, record):
+        memory = record['peak_bytes'] if record['peak_bytes'] is not None else record['maxrss_bytes']
+        rows = '' if record['rows'] is None else f"  rows={record['rows']:,}"
+        memory = '' if memory is None else f'  mem={memory / 2 ** 20:.1f}MiB'
+        print(f"{'  ' * record['depth']}{record['name']}: {record['seconds']:.3f}s{rows}{memory}",
+              file=self.stream or sys.stdout)
+
+
+class Tracer:
+    def __init__(self, hooks=(), trace_memory=False, profile=False, output=None, profile_limit=20):
+        self.hooks = list(hooks)
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.output = output
+        self.profile_limit = profile_limit
+        self.run_id = uuid.uuid4().hex
+        self.records = []
+        self._stack = []
+        self._started = None
+        self._origin = None
+        self._previous = None
+        self._owns_tracemalloc = False
+
+    # Make this the active tracer (also usable without a with-block in notebooks)
+    def start(self):
+        global _active
+        self._previous, _active = _active, self
+        self._started = datetime.datetime.now(datetime.timezone.utc)
+        self._origin = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        return self
+
+    # Deactivate, and write the JSON trace if an output path was given
+    def finish(self):
+        global _active
+        _active = self._previous
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        if self.output:
+            self.write_json(self.output)
+        return self.trace()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+    def _segment_peak(self):
+        # Fold the peak seen so far into the innermost open stage before the
+        # tracemalloc peak counter is reset for a new segment
+        if self.trace_memory and self._stack:
+            frame = self._stack[-1]
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        depth = len(self._stack)
+        for hook in self.hooks:
+            hook.start(name, depth)
+        self._segment_peak()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        frame = {'name': name, 'peak': 0, 'rows': rows}
+        self._stack.append(frame)
+        profiler = cProfile.Profile() if self.profile and depth == 0 else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield frame
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+            self._segment_peak()
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+            record = {
+                'name': name,
+                'parent': self._stack[-1]['name'] if self._stack else None,
+                'depth': depth,
+                'offset': start - self._origin,
+                'seconds': seconds,
+                'rows': frame['rows'],
+                'peak_bytes': frame['peak'] if self.trace_memory else None,
+                'maxrss_bytes': maxrss_bytes(),
+                'profile': self._profile_summary(profiler) if profiler is not None else None
+            }
+            self.records.append(record)
+            for hook in self.hooks:
+                hook.end(record)
+
+    def _profile_summary(self, profiler):
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        summary = []
+        for (filename, line, function), (_, ncalls, _, cumtime, _) in stats.stats.items():
+            summary.append({'function': f'{os.path.basename(filename)}:{line}({function})', 'ncalls': ncalls, 'cumtime': cumtime})
+        summary.sort(key=lambda entry: entry['cumtime'], reverse=True)
+        return summary[:self.profile_limit]
+
+    def trace(self):
+        return {
+            'run_id': self.run_id,
+            'started': self._started.isoformat() if self._started else None,
+            'options': {'trace_memory': self.trace_memory, 'profile': self.profile},
+            'stages': self.records
+        }
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f, indent=2)
+
+
+def active_tracer():
+    return _active
+
+
+# Stage of the active tracer; a no-op when none is active. The yielded dict's
+# 'rows' entry can be set inside the block.
+@contextmanager
+def stage(name, rows=None):
+    if _active is None:
+        yield {'rows': rows}
+        return
+    with _active.stage(name, rows) as frame:
+        yield frame
+
+
+# Decorator reporting each call as a stage; rows(result) gives the row count
+def traced(name=None, rows=_rows):
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(stage_name) as frame:
+                result = func(*args, **kwargs)
+                frame['rows'] = rows(result) if rows is not None else None
+                return result
+        return wrapper
+    return decorator
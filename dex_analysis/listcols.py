@@ -0,0 +1,123 @@
+# Vectorized parser for the stringified list columns (projects, pool_ids)
+#
+# Cells look like "['uniswap', 'sushiswap', '0x API']" (Python list reprs).
+# Instead of running eval/literal_eval on every row, the brackets and outer
+# quotes are sliced off and the remainder is split on the "', '" separator
+# in one pass over the whole column. The result is kept in CSR form: a flat
+# array of values plus row offsets, from which counts and the exploded
+# (row, value) view follow without touching Python objects per row. When
+# only the counts are needed, the separators are counted instead of split.
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .instrument import traced
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+# Separator between two quoted items; repr() switches to double quotes for
+# items that contain an apostrophe, so accept either quote on each side
+SEPARATOR = r"""['"], ['"]"""
+
+# values: flat array of items, offsets: row i spans values[offsets[i]:offsets[i + 1]]
+class ParsedList(namedtuple('ParsedList', ['values', 'offsets'])):
+    __slots__ = ()
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _inner_arrow(series):
+    array = pa.array(series, from_pandas=True)
+    inner = pc.utf8_slice_codeunits(array, 2, -2)
+    # "[]" slices down to "" which would split into [""]; treat it like a missing cell
+    return pc.if_else(pc.equal(pc.utf8_length(inner), 0), pa.scalar(None, inner.type), inner)
+
+
+# The regex kernels are several times slower, only pay for them when some
+# item was double-quoted
+def _double_quoted(inner):
+    return bool(pc.any(pc.match_substring(inner, '"')).as_py())
+
+
+def _parse_arrow(series):
+    inner = _inner_arrow(series)
+    if _double_quoted(inner):
+        pieces = pc.split_pattern_regex(inner, SEPARATOR)
+    else:
+        pieces = pc.split_pattern(inner, "', '")
+    lengths = pc.fill_null(pc.list_value_length(pieces), 0).to_numpy(zero_copy_only=False)
+    flat = pc.list_flatten(pieces).to_numpy(zero_copy_only=False)
+    return ParsedList(flat, _offsets(lengths))
+
+
+# A non-empty cell holds one item more than separators
+def _count_arrow(series):
+    inner = _inner_arrow(series)
+    if _double_quoted(inner):
+        separators = pc.count_substring_regex(inner, SEPARATOR)
+    else:
+        separators = pc.count_substring(inner, "', '")
+    return pc.fill_null(pc.add(separators, 1), 0).to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+def _inner_pandas(series):
+    return series.fillna('[]').astype(str).str.slice(2, -2)
+
+
+def _parse_pandas(series):
+    inner = _inner_pandas(series)
+    pieces = inner.str.split(SEPARATOR, regex=True)
+    lengths = pieces.str.len().to_numpy(dtype=np.int64, copy=True)
+    lengths[(inner.str.len() == 0).to_numpy()] = 0
+    flat = pieces[lengths > 0].explode().to_numpy(dtype=object)
+    return ParsedList(flat, _offsets(lengths))
+
+
+def _count_pandas(series):
+    inner = _inner_pandas(series)
+    lengths = inner.str.count(SEPARATOR).to_numpy(dtype=np.int64) + 1
+    lengths[(inner.str.len() == 0).to_numpy()] = 0
+    return lengths
+
+
+# Number of items in every cell of a column of stringified lists
+def count_list_items(series):
+    if pa is not None:
+        return _count_arrow(series)
+    return _count_pandas(series)
+
+
+# Parse a column of stringified lists; missing cells count as empty lists.
+# With values=False only the offsets are built (enough for counts).
+def parse_list_column(series, values=True):
+    if not values:
+        return ParsedList(None, _offsets(count_list_items(series)))
+    if pa is not None:
+        return _parse_arrow(series)
+    return _parse_pandas(series)
+
+
+# Number of items per row, aligned with the input index
+@traced()
+def list_counts(series):
+    return pd.Series(count_list_items(series), index=series.index, name=series.name)
+
+
+# Long-format (row label, item) frame, the exploded equivalent of the column
+def explode_list_column(series, parsed=None):
+    parsed = parsed if parsed is not None else parse_list_column(series)
+    rows = np.repeat(series.index.to_numpy(), parsed.counts)
+    return pd.DataFrame({'row': rows, series.name or 'value': parsed.values})
@@ -0,0 +1,207 @@
+# Per-chain top-K pairs and robust outlier flags
+#
+# Rows are grouped by chain once (a stable sort of the integer chain codes
+# into contiguous segments). For every metric, each chain's segment then
+# gets its top-K by partial selection (np.partition, only the K winners
+# are sorted), its quartiles/median by np.partition-based quantiles, and its
+# median absolute deviation. Fences are broadcast back to the rows by chain
+# code, so flagging is plain array arithmetic. Non-finite values are left
+# out of the statistics and never flagged.
+#
+#     stats = robust_stats(all_dex_data)
+#     alerts = outliers(all_dex_data, stats=stats)
+#     leaders = top_k(all_dex_data, k=5)
+import numpy as np
+import pandas as pd
+
+from .features import chain_codes
+from .instrument import traced
+
+OUTLIER_METRICS = ['seven_day_volume', 'usd_liquidity', 'seven_day_volume_liquidity_ratio']
+IQR_K = 1.5
+# Robust z-score cut-off of Iglewicz and Hoaglin; 0.6745 makes MAD comparable to a std
+MAD_THRESHOLD = 3.5
+MAD_SCALE = 0.6745
+
+
+# Row order that makes every chain a contiguous segment, and the segment offsets
+def group_segments(codes, n_groups):
+    # Stable sorts of int16 keys are radix sorts; rows without a chain (-1)
+    # sort first and are skipped
+    keys = codes.astype(np.int16) if n_groups < np.iinfo(np.int16).max else codes
+    order = np.argsort(keys, kind='stable')
+    counts = np.bincount(codes + 1, minlength=n_groups + 1)
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(counts[1:], out=offsets[1:])
+    return order[counts[0]:], offsets
+
+
+def _segments(data):
+    codes, chains = chain_codes(data['chain'])
+    order, offsets = group_segments(codes, len(chains))
+    return codes, [str(chain) for chain in chains], order, offsets
+
+
+def _values(data, metric):
+    return data[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# The k largest `metric` values of each chain, largest first; one row per
+# (chain, metric, rank) with the pair's token_pair, value and index label
+@traced()
+def top_k(data, metrics=OUTLIER_METRICS, k=10):
+    _, chains, order, offsets = _segments(data)
+    parts = []
+    for metric in metrics:
+        values = _values(data, metric)[order]
+        for group, chain in enumerate(chains):
+            segment = values[offsets[group]:offsets[group + 1]]
+            positions = np.arange(offsets[group], offsets[group + 1])
+            finite = np.isfinite(segment)
+            if not finite.all():
+                positions, segment = positions[finite], segment[finite]
+            n = min(k, len(segment))
+            if n == 0:
+                continue
+            # n-th largest value by partial selection; ties at the cut keep the
+            # earliest rows, like DataFrame.nlargest
+            cut = np.partition(segment, len(segment) - n)[len(segment) - n]
+            above = np.flatnonzero(segment > cut)
+            best = np.concatenate([above, np.flatnonzero(segment == cut)[:n - len(above)]])
+            best = best[np.lexsort((best, -segment[best]))]
+            parts.append((chain, metric, order[positions[best]], segment[best]))
+    if not parts:
+        return pd.DataFrame(columns=['chain', 'metric', 'rank', 'token_pair', 'value', 'row'])
+    rows = np.concatenate([part[2] for part in parts])
+    result = pd.DataFrame({
+        'chain': np.repeat([part[0] for part in parts], [len(part[2]) for part in parts]),
+        'metric': np.repeat([part[1] for part in parts], [len(part[2]) for part in parts]),
+        'rank': np.concatenate([np.arange(1, len(part[2]) + 1) for part in parts]),
+        'token_pair': data['token_pair'].take(rows).to_numpy(dtype=object) if 'token_pair' in data else None,
+        'value': np.concatenate([part[3] for part in parts]),
+        'row': data.index.take(rows)
+    })
+    return result
+
+
+# Linear-interpolated quantiles (as np.quantile) of `values`, which is
+# partially reordered in place
+def _quantiles(values, qs):
+    positions = np.asarray(qs) * (len(values) - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, len(values) - 1)
+    values.partition(np.unique(np.concatenate([lower, upper])))
+    weight = positions - lower
+    return values[lower] * (1 - weight) + values[upper] * weight
+
+
+# Per chain and metric: count, quartiles, median, MAD and the IQR fences
+@traced()
+def robust_stats(data, metrics=OUTLIER_METRICS, iqr_k=IQR_K):
+    return _stats(data, metrics, iqr_k, _segments(data))
+
+
+def _stats(data, metrics, iqr_k, segments):
+    _, chains, order, offsets = segments
+    records = []
+    for metric in metrics:
+        values = _values(data, metric)[order]
+        for group, chain in enumerate(chains):
+            # A copy either way, so the partitions below may reorder it
+            segment = values[offsets[group]:offsets[group + 1]]
+            finite = np.isfinite(segment)
+            segment = segment[finite] if not finite.all() else segment.copy()
+            if len(segment) == 0:
+                q1 = median = q3 = mad = np.nan
+            else:
+                q1, median, q3 = _quantiles(segment, [0.25, 0.5, 0.75])
+                deviation = np.abs(segment - median)
+                mad = _quantiles(deviation, [0.5])[0]
+            iqr = q3 - q1
+            records.append((chain, metric, len(segment), q1, median, q3, iqr, q1 - iqr_k * iqr, q3 + iqr_k * iqr, mad))
+    return pd.DataFrame(records, columns=['chain', 'metric', 'count', 'q1', 'median', 'q3', 'iqr', 'lower_fence',
+                                          'upper_fence', 'mad'])
+
+
+# Boolean frame aligned with `data`: one '<metric>_iqr' and/or '<metric>_mad'
+# column per metric
+@traced(rows=None)
+def flag_outliers(data, metrics=OUTLIER_METRICS, methods=('iqr', 'mad'), iqr_k=IQR_K, mad_threshold=MAD_THRESHOLD,
+                  stats=None):
+    flags, _, _ = _flags(data, metrics, methods, iqr_k, mad_threshold, stats)
+    return pd.DataFrame(flags, index=data.index)
+
+
+# Per-chain arrays of one metric's statistics, in chain-code order with a
+# trailing NaN that rows without a chain (code -1) pick up
+def _chain_table(stats, metric, chains):
+    table = stats[stats['metric'] == metric].set_index('chain').reindex(chains)
+    return {column: np.append(table[column].to_numpy(dtype=np.float64), np.nan)
+            for column in ('median', 'iqr', 'lower_fence', 'upper_fence', 'mad')}
+
+
+# Flags in row order, with the chain statistics broadcast to the rows by chain
+# code; returns ({column: bool array}, codes, {metric: chain table}). The
+# statistics are only computed (and the rows only sorted) when not given.
+def _flags(data, metrics, methods, iqr_k, mad_threshold, stats):
+    if stats is None:
+        segments = _segments(data)
+        stats = _stats(data, metrics, iqr_k, segments)
+        codes, chains = segments[0], segments[1]
+    else:
+        codes, chains = chain_codes(data['chain'])
+        chains = [str(chain) for chain in chains]
+    flags, tables = {}, {}
+    for metric in metrics:
+        table = tables[metric] = _chain_table(stats, metric, chains)
+        values = _values(data, metric)
+        finite = np.isfinite(values)
+        with np.errstate(invalid='ignore'):
+            if 'iqr' in methods:
+                # A zero IQR (over half the chain between equal quartiles) is never
+                # flagged, as for a zero MAD below
+                spread = table['iqr'] != 0
+                lower = np.where(spread, table['lower_fence'], np.nan)[codes]
+                upper = np.where(spread, table['upper_fence'], np.nan)[codes]
+                flags[f'{metric}_iqr'] = (values < lower) | (values > upper)
+            if 'mad' in methods:
+                # |z| > threshold  <=>  |value - median| > threshold * MAD / MAD_SCALE
+                limit = np.where(table['mad'] > 0, mad_threshold * table['mad'] / MAD_SCALE, np.nan)
+                flags[f'{metric}_mad'] = np.abs(values - table['median'][codes]) > limit[codes]
+        if not finite.all():
+            for method in methods:
+                flags[f'{metric}_{method}'] &= finite
+    return flags, codes, tables
+
+
+# Score of flagged rows: (value - median) / IQR for 'iqr', the robust z for 'mad'
+def _scores(values, row_codes, table, method):
+    deviation = values - table['median'][row_codes]
+    if method == 'iqr':
+        return deviation / table['iqr'][row_codes]
+    return deviation * MAD_SCALE / table['mad'][row_codes]
+
+
+# Long table of flagged rows (chain, token_pair, metric, method, value,
+# score), for alerting. Only the flagged rows are scored and labelled.
+@traced()
+def outliers(data, metrics=OUTLIER_METRICS, methods=('iqr', 'mad'), iqr_k=IQR_K, mad_threshold=MAD_THRESHOLD,
+             stats=None):
+    flags, codes, tables = _flags(data, metrics, methods, iqr_k, mad_threshold, stats)
+    frames = []
+    for column, flagged in flags.items():
+        rows = np.flatnonzero(flagged)
+        metric, method = column.rsplit('_', 1)
+        values = _values(data, metric)[rows]
+        frames.append(pd.DataFrame({
+            # Label columns keep their dtype (categoricals stay codes)
+            'chain': data['chain'].array.take(rows),
+            'token_pair': data['token_pair'].array.take(rows) if 'token_pair' in data else None,
+            'metric': metric,
+            'method': method,
+            'value': values,
+            'score': _scores(values, codes[rows], tables[metric], method),
+            'row': data.index.take(rows)
+        }))
+    columns = ['chain', 'token_pair', 'metric', 'method', 'value', 'score', 'row']
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
@@ -0,0 +1,53 @@
+# Parallel load-and-preprocess of the per-chain snapshots
+#
+# Chains are independent, so each one is loaded, cleaned (inf -> NaN,
+# forward fill) and optionally rescaled in its own worker process. Results
+# are yielded as soon as each chain finishes.
+#
+# With the spawn and forkserver start methods (the default on macOS and
+# Windows, and on Linux from Python 3.14) the pool may only be started from
+# code behind an `if __name__ == '__main__':` guard; module-level code in
+# notebooks and scripts should pass max_workers=1.
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import cache
+from .data import preprocess_data, scale_metrics
+from .instrument import traced
+
+
+# Worker: full per-chain pipeline, returns (chain, DataFrame)
+def load_and_preprocess(chain, file_path, columns=None, scale=True, use_cache=True):
+    data = cache.load_data(file_path, columns=columns, use_cache=use_cache)
+    data = preprocess_data(data)
+    if scale:
+        data = scale_metrics(data)
+    return chain, data
+
+
+def default_workers(n_tasks):
+    return max(1, min(n_tasks, os.cpu_count() or 1))
+
+
+# Yield (chain, DataFrame) for every entry of {chain: path} in completion order.
+# max_workers=1 runs in-process, which also avoids pickling the frames back.
+def iter_preprocessed(file_paths, max_workers=None, columns=None, scale=True, use_cache=True):
+    file_paths = dict(file_paths)
+    max_workers = max_workers or default_workers(len(file_paths))
+    if max_workers == 1:
+        for chain, file_path in file_paths.items():
+            yield load_and_preprocess(chain, file_path, columns, scale, use_cache)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(load_and_preprocess, chain, file_path, columns, scale, use_cache)
+                   for chain, file_path in file_paths.items()]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# Same as iter_preprocessed, collected into a dict in the input order
+@traced(rows=lambda frames: sum(len(data) for data in frames.values()))
+def preprocess_all(file_paths, max_workers=None, columns=None, scale=True, use_cache=True):
+    file_paths = dict(file_paths)
+    results = dict(iter_preprocessed(file_paths, max_workers, columns, scale, use_cache))
+    return {chain: results[chain] for chain in file_paths}
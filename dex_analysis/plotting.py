@@ -0,0 +1,155 @@
+# Matplotlib/seaborn figures of the two notebooks
+#
+# Every helper builds and returns a Figure instead of calling plt.show(), so
+# the same code serves the notebooks (followed by plt.show()) and headless
+# batch runs (followed by fig.savefig()). Passing a previously returned
+# figure as `fig` redraws into its cleared axes instead of building a new
+# figure. matplotlib and seaborn are only imported when a figure is
+# requested; call use_headless_backend() first when there is no display.
+from .downsample import DEFAULT_POINTS, downsample
+from .instrument import traced
+
+VOLUME_LABELS = {'one_day_volume': 'Daily Volume', 'seven_day_volume': 'Weekly Volume', 'thirty_day_volume': 'Monthly Volume'}
+
+
+def use_headless_backend():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def close_figures(figures):
+    plt = _pyplot()
+    for fig in figures:
+        plt.close(fig)
+
+
+# New figure, or `fig`'s axes cleared for reuse when it has the same layout
+def _subplots(figsize, ncols=1, fig=None):
+    if fig is not None and len(fig.axes) == ncols:
+        for ax in fig.axes:
+            ax.clear()
+        fig.set_size_inches(*figsize)
+        return fig, (fig.axes if ncols > 1 else fig.axes[0])
+    return _pyplot().subplots(1, ncols, figsize=figsize)
+
+
+def _seaborn():
+    import seaborn as sns
+    # Set the aesthetic style of the plots
+    sns.set_style("whitegrid")
+    return sns
+
+
+# Trading volumes of one chain (long series are downsampled to max_points)
+@traced(rows=None)
+def plot_trading_volumes(data, chain_name, max_points=DEFAULT_POINTS, fig=None):
+    fig, ax = _subplots((14, 7), fig=fig)
+    for col, label in VOLUME_LABELS.items():
+        ax.plot(downsample(data[col], max_points), label=label)
+    ax.set_title(f'Trading Volumes on {chain_name}')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Volume (in USD)')
+    ax.legend()
+    return fig
+
+
+# Liquidity of one chain
+@traced(rows=None)
+def plot_liquidity(data, chain_name, max_points=DEFAULT_POINTS, fig=None):
+    fig, ax = _subplots((14, 7), fig=fig)
+    ax.plot(downsample(data['usd_liquidity'], max_points), color='purple')
+    ax.set_title(f'Liquidity Over Time on {chain_name}')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('USD Liquidity')
+    return fig
+
+
+# Average trading volumes across blockchains
+@traced(rows=None)
+def compare_average_volumes(*datasets, labels, fig=None):
+    import pandas as pd
+
+    averages = [data[list(VOLUME_LABELS)].mean() for data in datasets]
+    df_averages = pd.DataFrame(averages, index=labels)
+    fig, ax = _subplots((14, 7), fig=fig)
+    df_averages.plot(kind='bar', ax=ax)
+    ax.set_title('Comparison of Average Trading Volumes Across Blockchains')
+    ax.set_xlabel('Blockchain')
+    ax.set_ylabel('Average Volume (in USD)')
+    ax.legend(list(VOLUME_LABELS.values()))
+    return fig
+
+
+# Average liquidity across blockchains
+@traced(rows=None)
+def compare_liquidity(*datasets, labels, fig=None):
+    import pandas as pd
+
+    liquidity = [data['usd_liquidity'].mean() for data in datasets]
+    df_liquidity = pd.DataFrame(liquidity, index=labels, columns=['Average USD Liquidity'])
+    fig, ax = _subplots((14, 7), fig=fig)
+    df_liquidity.plot(kind='bar', color='purple', ax=ax)
+    ax.set_title('Comparison of Average USD Liquidity Across Blockchains')
+    ax.set_xlabel('Blockchain')
+    ax.set_ylabel('USD Liquidity')
+    return fig
+
+
+# 7-day volume and liquidity distributions per chain (unified, scaled frame)
+@traced(rows=None)
+def plot_volume_liquidity_boxplots(all_dex_data, fig=None):
+    sns = _seaborn()
+    fig, (left, right) = _subplots((16, 6), ncols=2, fig=fig)
+    sns.boxplot(x='chain', y='seven_day_volume', data=all_dex_data, ax=left)
+    left.set_title('Comparison of 7-Day Trading Volume Across Chains')
+    left.set_ylabel('Volume (in billions)')
+    left.set_xlabel('Blockchain Chain')
+    sns.boxplot(x='chain', y='usd_liquidity', data=all_dex_data, ax=right)
+    right.set_title('Comparison of USD Liquidity Across Chains')
+    right.set_ylabel('Liquidity (in billions)')
+    right.set_xlabel('Blockchain Chain')
+    fig.tight_layout()
+    return fig
+
+
+@traced(rows=None)
+def plot_project_count_impact(all_dex_data, fig=None):
+    sns = _seaborn()
+    fig, ax = _subplots((10, 6), fig=fig)
+    sns.scatterplot(x='project_count', y='seven_day_volume', hue='chain', data=all_dex_data, palette='Set2',
+                    size='usd_liquidity', sizes=(20, 200), ax=ax)
+    ax.set_title('Project Count Impact on 7-Day Volume and Liquidity')
+    ax.set_xlabel('Number of Projects')
+    ax.set_ylabel('7-Day Volume (in billions)')
+    ax.grid(True)
+    ax.legend(title='Chain')
+    return fig
+
+
+# Bar chart of one chain_aggregates column
+@traced(rows=None)
+def plot_chain_bar(chain_aggregates, column, title, ylabel, fig=None):
+    sns = _seaborn()
+    fig, ax = _subplots((10, 6), fig=fig)
+    sns.barplot(x='chain', y=column, data=chain_aggregates, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel('Blockchain Chain')
+    ax.set_ylabel(ylabel)
+    return fig
+
+
+# One column of a dated history (HistoryStore.series / chain_totals)
+@traced(rows=None)
+def plot_history(history, column, title, ylabel, fig=None):
+    fig, ax = _subplots((14, 7), fig=fig)
+    ax.plot(history.index, history[column], marker='o')
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(ylabel)
+    fig.autofmt_xdate()
+    return fig
@@ -0,0 +1,124 @@
+# Parallel, incremental rendering of the report figures
+#
+# render_figures() takes the (name, plotting function, args, kwargs) jobs of
+# report.figure_jobs() and draws them on the Agg backend across a process
+# pool. Each worker keeps the last figure of every plotting function and
+# redraws into its cleared axes instead of building a new figure per job.
+# With max_workers=1 the jobs run in the calling process on its current
+# matplotlib backend, and the figures are closed once all jobs are done.
+# A manifest in the output directory records a fingerprint of every job's
+# input data; figures whose fingerprint and files are unchanged are skipped.
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import cache
+from .instrument import traced
+from .parallel import default_workers
+
+MANIFEST_FILENAME = '.render_manifest.json'
+# Bump when the plotting code changes in a way the inputs do not capture
+RENDER_VERSION = 1
+
+# Figure templates of a worker process: plotting function name -> Figure
+_templates = {}
+
+
+def _update(digest, value):
+    import pandas as pd
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            _update(digest, key)
+            _update(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+# Fingerprint of one job: plotting function, its inputs and the output formats
+def job_fingerprint(func, args, kwargs, formats):
+    digest = hashlib.sha256()
+    _update(digest, (RENDER_VERSION, func.__module__, func.__qualname__, tuple(formats)))
+    _update(digest, args)
+    _update(digest, kwargs)
+    return digest.hexdigest()
+
+
+def _output_paths(output_dir, name, formats):
+    return [os.path.join(output_dir, f'{name}.{fmt}') for fmt in formats]
+
+
+def _init_worker():
+    from .plotting import use_headless_backend
+
+    use_headless_backend()
+
+
+# Worker: draw one job into its template figure and save every format
+def render_job(name, func, args, kwargs, output_dir, formats, templates=None):
+    templates = _templates if templates is None else templates
+    key = func.__qualname__
+    fig = func(*args, fig=templates.get(key), **kwargs)
+    templates[key] = fig
+    paths = _output_paths(output_dir, name, formats)
+    for fmt, path in zip(formats, paths):
+        cache.replace_atomic(path, lambda tmp_path: fig.savefig(tmp_path, format=fmt))
+    return name, paths
+
+
+# Render the jobs whose inputs changed since the last run; returns
+# (written paths, names of skipped jobs). max_workers=1 renders in-process.
+@traced(rows=lambda result: len(result[0]))
+def render_figures(jobs, output_dir, formats=('png',), max_workers=None, force=False):
+    formats = tuple(formats)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    manifest = {} if force else (cache.read_json(manifest_path) or {})
+
+    pending, skipped, fingerprints = [], [], {}
+    for name, func, args, kwargs in jobs:
+        fingerprints[name] = job_fingerprint(func, args, kwargs, formats)
+        up_to_date = (manifest.get(name) == fingerprints[name]
+                      and all(os.path.exists(path) for path in _output_paths(output_dir, name, formats)))
+        if up_to_date:
+            skipped.append(name)
+        else:
+            pending.append((name, func, args, kwargs))
+
+    written = []
+    max_workers = max_workers or default_workers(len(pending))
+    try:
+        if max_workers == 1 or len(pending) <= 1:
+            # The caller's backend is left alone and its module state untouched
+            templates = {}
+            try:
+                for name, func, args, kwargs in pending:
+                    _, paths = render_job(name, func, args, kwargs, output_dir, formats, templates)
+                    manifest[name] = fingerprints[name]
+                    written.extend(paths)
+            finally:
+                if templates:
+                    from .plotting import close_figures
+
+                    close_figures(templates.values())
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(render_job, name, func, args, kwargs, output_dir, formats)
+                           for name, func, args, kwargs in pending]
+                for future in as_completed(futures):
+                    name, paths = future.result()
+                    manifest[name] = fingerprints[name]
+                    written.extend(paths)
+    finally:
+        # Keep the fingerprints of whatever finished, even if a job failed
+        cache.write_json(manifest_path, {name: manifest[name] for name in fingerprints if name in manifest})
+    return written, skipped
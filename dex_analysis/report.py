@@ -0,0 +1,108 @@
+# Batch version of the two notebooks: load, clean, aggregate and plot
+#
+# run_report() reads every dex_pairs_<chain>.csv of a data directory, writes
+# chain_aggregates as CSV/JSON, the dtype footprint of the unified frame and
+# the per-chain top pairs and outliers, and (optionally) renders all notebook
+# figures to files, without a display and without the notebooks' module-level
+# state.
+# Figures are rendered in parallel and only when their inputs changed
+# (dex_analysis.render).
+import os
+
+from . import cache
+from .data import (ADDRESS_COLUMNS, ANALYSIS_COLUMNS, CHAIN_LABELS, CHAINS, LIST_COLUMNS, VOLUME_COLUMNS, chain_paths,
+                   preprocess_data, scale_metrics)
+from .dtypes import DEFAULT_ATOL, optimize_dtypes
+from .features import chain_features
+from .instrument import PrintHook, Tracer, stage
+from .listcols import list_counts
+from .outliers import outliers, top_k
+
+# (file name, chain_aggregates column, title, y label) of the report's bar charts
+REPORT_BARS = [
+    ('liquidity_ratio', 'liquidity_ratio', 'Liquidity to Volume Ratio by Chain', 'Liquidity to Volume Ratio'),
+    ('project_count', 'project_count', 'Average Number of Projects by Chain', 'Average Project Count')
+]
+
+# Columns the report reads from the cache: the analysis metrics plus the
+# projects list behind project_count (pool_ids and the addresses are not used)
+REPORT_COLUMNS = ANALYSIS_COLUMNS + ['projects']
+
+
+def load_chains(data_dir, chains=None, columns=None):
+    return {chain: cache.load_data(path, columns=columns) for chain, path in chain_paths(data_dir, chains).items()}
+
+
+# Unified, cleaned frame of the Analysis Report: metrics in billions (in USD
+# with scale=False), project counts, and without the list/address columns
+def integrate(datasets, scale=True):
+    import pandas as pd
+
+    with stage('concat') as frame:
+        all_dex_data = pd.concat(datasets.values(), ignore_index=True)
+        frame['rows'] = len(all_dex_data)
+    if scale:
+        all_dex_data = scale_metrics(all_dex_data)
+    all_dex_data['project_count'] = list_counts(all_dex_data['projects'])
+    return all_dex_data.drop(columns=[col for col in ADDRESS_COLUMNS + LIST_COLUMNS if col in all_dex_data])
+
+
+# (name, plotting function, args, kwargs) for every notebook figure. Each job
+# only gets the columns it plots, so the frames pickled to the render workers
+# and hashed into the fingerprints stay small, and a change to any other
+# column does not re-render the figure.
+def figure_jobs(chain_data, all_dex_data, chain_aggregates):
+    from . import plotting
+
+    labels = [CHAIN_LABELS.get(chain, chain) for chain in chain_data]
+    volumes = {chain: data[VOLUME_COLUMNS] for chain, data in chain_data.items()}
+    liquidity = {chain: data[['usd_liquidity']] for chain, data in chain_data.items()}
+    jobs = []
+    for chain in chain_data:
+        label = CHAIN_LABELS.get(chain, chain)
+        jobs.append((f'trading_volumes_{chain}', plotting.plot_trading_volumes, (volumes[chain], label), {}))
+        jobs.append((f'liquidity_{chain}', plotting.plot_liquidity, (liquidity[chain], label), {}))
+    jobs.append(('average_volumes', plotting.compare_average_volumes, tuple(volumes.values()), {'labels': labels}))
+    jobs.append(('average_liquidity', plotting.compare_liquidity, tuple(liquidity.values()), {'labels': labels}))
+    jobs.append(('volume_liquidity_boxplots', plotting.plot_volume_liquidity_boxplots,
+                 (all_dex_data[['chain', 'seven_day_volume', 'usd_liquidity']],), {}))
+    jobs.append(('project_count_impact', plotting.plot_project_count_impact,
+                 (all_dex_data[['chain', 'project_count', 'seven_day_volume', 'usd_liquidity']],), {}))
+    for name, column, title, ylabel in REPORT_BARS:
+        jobs.append((name, plotting.plot_chain_bar, (chain_aggregates[['chain', column]], column, title, ylabel), {}))
+    return jobs
+
+
+def run_report(data_dir, output_dir, chains=None, figures=True, formats=('png',), trace=False, verbose=False,
+               workers=None, force=False, dtype_atol=DEFAULT_ATOL):
+    tracer = None
+    if trace or verbose:
+        tracer = Tracer(hooks=[PrintHook()] if verbose else [],
+                        output=os.path.join(output_dir, 'trace.json') if trace else None).start()
+    try:
+        datasets = load_chains(data_dir, chains or CHAINS, columns=REPORT_COLUMNS)
+        all_dex_data = integrate(datasets, scale=False)
+        os.makedirs(output_dir, exist_ok=True)
+        # Ranked and flagged on the raw USD metrics: rounded to billions most
+        # pairs are 0.0 and the chains' quartiles collapse
+        top_k(all_dex_data).to_csv(os.path.join(output_dir, 'top_pairs.csv'), index=False)
+        outliers(all_dex_data).to_csv(os.path.join(output_dir, 'outliers.csv'), index=False)
+        all_dex_data = scale_metrics(all_dex_data)
+        # Aggregated from the float64 metrics; optimize_dtypes downcasts in place
+        chain_aggregates = chain_features(all_dex_data)
+        all_dex_data, dtype_footprint = optimize_dtypes(all_dex_data, atol=dtype_atol)
+        dtype_footprint.to_csv(os.path.join(output_dir, 'dtype_footprint.csv'))
+        chain_aggregates.to_csv(os.path.join(output_dir, 'chain_aggregates.csv'), index=False)
+        chain_aggregates.to_json(os.path.join(output_dir, 'chain_aggregates.json'), orient='records', indent=2)
+        written, skipped = [], []
+        if figures:
+            from .render import render_figures
+
+            chain_data = {chain: preprocess_data(data[ANALYSIS_COLUMNS].copy()) for chain, data in datasets.items()}
+            jobs = figure_jobs(chain_data, all_dex_data, chain_aggregates)
+            written, skipped = render_figures(jobs, os.path.join(output_dir, 'figures'), formats,
+                                              max_workers=workers, force=force)
+        return chain_aggregates, written, skipped
+    finally:
+        if tracer is not None:
+            tracer.finish()
@@ -0,0 +1,229 @@
+# Production serving mode for the DEX dashboards
+#
+# The per-chain frames are preprocessed once and written as uncompressed
+# Arrow IPC files next to the Parquet cache. Every process memory-maps those
+# files, so the numeric columns live in the shared page cache instead of in
+# one private copy per worker. Both dashboards (per-chain volumes/liquidity
+# at /, cross-chain aggregates at /report/) are mounted on one Flask server
+# with /healthz and /readyz endpoints and run under gunicorn with the app
+# preloaded in the master process before the workers fork. Each worker maps
+# the IPC files again in its post_worker_init hook and only then reports
+# ready, so /readyz answers 503 until that worker can serve. Pair-level
+# questions go to the SQLite store (dex_analysis.database) through
+# /api/top-pairs and /api/projects.
+#
+#   python -m dex_analysis.serve --data-dir dex_data --workers 4 --port 8050
+import argparse
+import os
+
+import pyarrow as pa
+import pyarrow.ipc
+
+from . import cache
+from .data import ANALYSIS_COLUMNS, CHAIN_LABELS, CHAINS, chain_paths, preprocess_data
+from .database import DexDatabase
+from .figures import FigureCache
+from .incremental import refresh_chain_aggregates
+
+CUSTOM_COLORS = ['#0074D9', '#FF4136', '#2ECC40', '#FF851B', '#7FDBFF', '#B10DC9']
+
+
+def ipc_path(file_path):
+    parquet_path, _ = cache.cache_paths(file_path)
+    return os.path.splitext(parquet_path)[0] + '.arrow'
+
+
+# Write the preprocessed analysis columns of one snapshot as an Arrow IPC
+# file, unless the existing one is newer than the snapshot's cache entry
+def export_shared(file_path, columns=ANALYSIS_COLUMNS):
+    path = ipc_path(file_path)
+    _, meta_path = cache.cache_paths(file_path)
+    fresh = cache.is_fresh(file_path) and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(meta_path)
+    if not fresh:
+        data = preprocess_data(cache.load_data(file_path, columns=columns))
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        def write(tmp_path):
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        cache.replace_atomic(path, write)
+    return path
+
+
+# Memory-mapped DataFrame over an IPC file; numeric columns without nulls are
+# zero-copy views of the mapping
+def map_shared(path):
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+
+def load_shared(file_paths):
+    return {chain: map_shared(export_shared(file_path)) for chain, file_path in file_paths.items()}
+
+
+# Name of the server extension holding the per-process readiness hook
+READY_EXTENSION = 'dex_dashboards'
+
+
+def trading_layout(chains):
+    from dash import dcc, html
+
+    return html.Div([
+        html.H1('DEX Trading Volumes and Liquidity Dashboard'),
+        dcc.Dropdown(
+            id='chain-dropdown',
+            options=[{'label': CHAIN_LABELS.get(chain, chain), 'value': chain} for chain in chains],
+            value=chains[0],
+            style={'width': '50%'}
+        ),
+        dcc.Graph(id='volume-graph'),
+        dcc.Graph(id='liquidity-graph')
+    ])
+
+
+def report_layout(chain_aggregates):
+    import plotly.express as px
+    from dash import dcc, html
+
+    graphs = [
+        ('liquidity-ratio-graph', 'liquidity_ratio', 'Liquidity to Volume Ratio by Chain'),
+        ('project-count-graph', 'project_count', 'Average Number of Projects by Chain'),
+        ('one-day-volume-graph', 'one_day_volume', 'Average One-Day Volume by Chain'),
+        ('seven-day-volume-graph', 'seven_day_volume', 'Average Seven-Day Volume by Chain')
+    ]
+    return html.Div(children=[
+        html.H1(children='DEX Data Dashboard'),
+        html.Div(children='A web dashboard for displaying DEX data metrics.')
+    ] + [
+        dcc.Graph(id=graph_id, figure=px.bar(chain_aggregates, x='chain', y=column, title=title,
+                                             color='chain', color_discrete_sequence=CUSTOM_COLORS))
+        for graph_id, column, title in graphs
+    ])
+
+
+# Flask server with both dashboards and the health/readiness endpoints.
+# With ready=False the server answers 503 on /readyz until
+# server.extensions[READY_EXTENSION]() has mapped the tables in this process.
+def create_server(data_dir='dex_data', chains=None, ready=True):
+    import dash
+    import flask
+    from dash.dependencies import Input, Output
+
+    file_paths = chain_paths(data_dir, chains or CHAINS)
+    state = {'ready': False, 'chains': {}}
+    server = flask.Flask(__name__)
+
+    @server.route('/healthz')
+    def healthz():
+        return flask.jsonify(status='ok')
+
+    # Ready once this process has mapped a table for every chain
+    @server.route('/readyz')
+    def readyz():
+        ready = state['ready'] and set(state['chains']) == set(file_paths)
+        return flask.jsonify({'ready': ready, 'chains': state['chains']}), (200 if ready else 503)
+
+    chain_data = load_shared(file_paths)
+    figure_cache = FigureCache(chain_data.__getitem__)
+    figure_cache.warm(chain_data)
+    chain_aggregates, _ = refresh_chain_aggregates(file_paths)
+
+    @server.route('/figures/<chain>.json')
+    def figures(chain):
+        if chain not in chain_data:
+            flask.abort(404)
+        return flask.Response(figure_cache.get_json(chain), mimetype='application/json')
+
+    database = DexDatabase.for_data_dir(data_dir)
+    database.ingest(file_paths)
+
+    def records(frame):
+        return flask.Response(frame.to_json(orient='records'), mimetype='application/json')
+
+    @server.route('/api/top-pairs')
+    def top_pairs():
+        args = flask.request.args
+        try:
+            frame = database.top_pairs(args.get('metric', 'seven_day_volume'), chain=args.get('chain'),
+                                       limit=args.get('limit', 10, type=int))
+        except ValueError as error:
+            return flask.jsonify(error=str(error)), 400
+        return records(frame)
+
+    @server.route('/api/projects')
+    def projects():
+        args = flask.request.args
+        return records(database.liquidity_by_project(chain=args.get('chain'), limit=args.get('limit', type=int)))
+
+    trading = dash.Dash('dex_trading', server=server, url_base_pathname='/')
+    trading.layout = trading_layout(list(chain_data))
+
+    @trading.callback(
+        [Output('volume-graph', 'figure'),
+         Output('liquidity-graph', 'figure')],
+        [Input('chain-dropdown', 'value')]
+    )
+    def update_graphs(selected_chain):
+        volume_fig, liquidity_fig = figure_cache.get(selected_chain)
+        return volume_fig, liquidity_fig
+
+    report = dash.Dash('dex_report', server=server, url_base_pathname='/report/')
+    report.layout = report_layout(chain_aggregates)
+
+    # Maps the IPC files again in the calling process; chain_data is updated
+    # in place so the figure cache and callbacks see the new mappings
+    def mark_ready():
+        chain_data.update(load_shared(file_paths))
+        state['chains'] = {chain: len(data) for chain, data in chain_data.items()}
+        state['ready'] = True
+
+    server.extensions[READY_EXTENSION] = mark_ready
+    if ready:
+        mark_ready()
+    return server
+
+
+# gunicorn post_worker_init hook: the preloaded app starts unready in the
+# master, every worker maps its tables after the fork
+def post_worker_init(worker):
+    worker.wsgi.extensions[READY_EXTENSION]()
+
+
+def run_gunicorn(factory, options):
+    from gunicorn.app.base import BaseApplication
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return factory()
+
+    DashboardApplication().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the DEX dashboards with gunicorn.')
+    parser.add_argument('--data-dir', default='dex_data')
+    parser.add_argument('--chains', nargs='+', default=None)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--timeout', type=int, default=60)
+    args = parser.parse_args(argv)
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'timeout': args.timeout,
+        # Load once in the master; workers inherit the mapped data on fork
+        'preload_app': True,
+        'post_worker_init': post_worker_init
+    }
+    run_gunicorn(lambda: create_server(args.data_dir, args.chains, ready=False), options)
+
+
+if __name__ == '__main__':
+    main()
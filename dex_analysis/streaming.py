@@ -0,0 +1,122 @@
+# Streaming, chunked aggregation of the per-chain snapshots
+#
+# Each CSV is read in bounded chunks; every chunk goes through the same
+# cleaning as the in-memory report (metrics in billions, project counts) and
+# its finite values are folded into per-chain count/mean/M2 accumulators,
+# the same NaN/inf-skipping rule as features.chain_features. Partial accumulators
+# combine with Chan et al.'s pairwise update, so results from separate
+# files, chunks or workers can be merged in any order and peak memory is
+# bounded by the chunk size rather than by the input.
+import numpy as np
+import pandas as pd
+
+from .data import DTYPES, FEATURE_COLUMNS, METRIC_COLUMNS, VOLUME_COLUMNS, scale_metrics
+from .features import volume_cv
+from .instrument import traced
+from .listcols import list_counts
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class ChainMoments:
+    def __init__(self, columns=FEATURE_COLUMNS):
+        self.columns = list(columns)
+        empty = pd.DataFrame(columns=self.columns, dtype='float64')
+        empty.index.name = 'chain'
+        self.count = empty
+        self.mean = empty.copy()
+        self.m2 = empty.copy()
+
+    # Fold in the per-chain moments of one cleaned chunk. Non-finite values
+    # (NaN and +-inf) are skipped, as in features.grouped_means.
+    def update(self, chunk):
+        values = chunk[self.columns].astype('float64')
+        values = values.where(np.isfinite(values))
+        grouped = values.groupby(chunk['chain'], sort=False, observed=True)
+        count = grouped.count().astype('float64')
+        mean = grouped.mean()
+        m2 = grouped.var(ddof=0) * count
+        self._combine(count, mean.fillna(0.0), m2.fillna(0.0))
+        return self
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count_b, mean_b, m2_b):
+        chains = self.count.index.union(count_b.index, sort=False)
+        count_a, mean_a, m2_a = (frame.reindex(chains, fill_value=0.0) for frame in (self.count, self.mean, self.m2))
+        count_b, mean_b, m2_b = (frame.reindex(chains, fill_value=0.0) for frame in (count_b, mean_b, m2_b))
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = (count_b / count).fillna(0.0)
+            self.mean = mean_a + delta * weight
+            self.m2 = m2_a + m2_b + delta ** 2 * count_a * weight
+        self.count = count
+
+    # JSON-friendly form: {'columns': [...], 'count'/'mean'/'m2': {chain: [...]}}
+    def to_dict(self):
+        result = {'columns': self.columns}
+        for name in ('count', 'mean', 'm2'):
+            frame = getattr(self, name)
+            result[name] = {str(chain): [float(v) for v in row] for chain, row in zip(frame.index, frame.to_numpy())}
+        return result
+
+    @classmethod
+    def from_dict(cls, payload):
+        moments = cls(payload['columns'])
+        for name in ('count', 'mean', 'm2'):
+            frame = pd.DataFrame.from_dict(payload[name], orient='index', columns=moments.columns, dtype='float64')
+            frame.index.name = 'chain'
+            setattr(moments, name, frame)
+        return moments
+
+    # Per-chain mean, sample std (ddof=1, like pandas) and sum of each column
+    def summary(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1)).where(self.count > 1)
+        mean = self.mean.where(self.count > 0)
+        return pd.concat({'mean': mean, 'std': std, 'sum': self.mean * self.count, 'count': self.count}, axis=1)
+
+    # Same layout as groupby('chain').agg('mean').reset_index() in the report
+    def aggregates(self):
+        result = self.mean.where(self.count > 0).sort_index()
+        result.index = result.index.astype(str).rename('chain')
+        return result.reset_index()
+
+
+# Report cleaning applied to one chunk
+def clean_chunk(chunk):
+    chunk = scale_metrics(chunk)
+    chunk['project_count'] = list_counts(chunk['projects'])
+    chunk['volume_std'] = volume_cv(chunk[VOLUME_COLUMNS].to_numpy(dtype='float64', na_value=np.nan))
+    return chunk
+
+
+# Read one snapshot in chunks of `chunksize` rows, skipping the pool/address lists
+def iter_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE):
+    columns = ['chain', 'projects', 'seven_day_volume_liquidity_ratio'] + METRIC_COLUMNS
+    dtype = {col: DTYPES[col] for col in columns}
+    return pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+
+@traced()
+def stream_moments(file_paths, chunksize=DEFAULT_CHUNKSIZE, moments=None):
+    moments = moments if moments is not None else ChainMoments()
+    for file_path in file_paths:
+        for chunk in iter_chunks(file_path, chunksize):
+            moments.update(clean_chunk(chunk))
+    return moments
+
+
+# Per-chain feature means plus liquidity_ratio, as in features.chain_features
+def chain_aggregates_from_moments(moments):
+    chain_aggregates = moments.aggregates()
+    chain_aggregates['liquidity_ratio'] = chain_aggregates['usd_liquidity'] / chain_aggregates[VOLUME_COLUMNS].mean(axis=1)
+    return chain_aggregates
+
+
+# chain_aggregates without holding any full frame
+def stream_chain_aggregates(file_paths, chunksize=DEFAULT_CHUNKSIZE):
+    return chain_aggregates_from_moments(stream_moments(file_paths, chunksize))
@@ -16,20 +16,23 @@
 # In[1]:
 
 
+import os
 import pandas as pd
+from dex_analysis.data import chain_paths, scale_metrics
+from dex_analysis.dtypes import optimize_dtypes
+from dex_analysis.report import integrate, load_chains
+from dex_analysis.addresses import build_address_index, tokens_on_multiple_chains
+from dex_analysis.instrument import PrintHook, Tracer
 
-# Paths to the dataset files
-file_paths = {
-    'Ethereum': 'Downloads/dex_data/dex_pairs_ethereum.csv',
-    'BNB': 'Downloads/dex_data/dex_pairs_bnb.csv',
-    'Solana': 'Downloads/dex_data/dex_pairs_solana.csv',
-    'Polygon': 'Downloads/dex_data/dex_pairs_polygon.csv',
-    'Arbitrum': 'Downloads/dex_data/dex_pairs_arbitrum.csv',
-    'Optimism': 'Downloads/dex_data/dex_pairs_optimism.csv'
-}
+# Report wall time, rows and memory of each pipeline stage, and save a JSON trace of the run
+tracer = Tracer(hooks=[PrintHook()], output='traces/dex_report_trace.json').start()
 
-# Load each dataset into a dictionary of DataFrames
-dex_datasets = {chain: pd.read_csv(path) for chain, path in file_paths.items()}
+# Directory with the dex_pairs_<chain>.csv files
+DATA_DIR = os.environ.get('DEX_DATA_DIR', 'Downloads/dex_data')
+file_paths = chain_paths(DATA_DIR)
+
+# Load each dataset into a dictionary of DataFrames (cached as Parquet after the first run)
+dex_datasets = load_chains(DATA_DIR)
 
 # Display the first few rows and info of each dataset
 for chain, data in dex_datasets.items():
@@ -58,21 +61,33 @@ for chain, data in dex_datasets.items():
 # In[2]:
 
 
-# Concatenate all datasets into a single DataFrame
-all_dex_data = pd.concat(dex_datasets.values(), ignore_index=True)
+# Keep the token/pool addresses as a compact integer index before they are dropped below
+address_index, encoded_pairs, index_chains = build_address_index(dex_datasets)
+print(tokens_on_multiple_chains(encoded_pairs, address_index, index_chains))
+
+# Token liquidity graph of every chain: how many tokens each pair of chains shares,
+# the connected token clusters, and the hub tokens holding most of the liquidity
+from dex_analysis.graph import build_graphs, components, hub_tokens, token_overlap
+
+address_index, token_graphs = build_graphs(dex_datasets, address_index)
+print(token_overlap(token_graphs))
+for chain, graph in token_graphs.items():
+    print(chain, components(graph)[1].head(3), hub_tokens(graph, address_index, k=5), sep='\n')
 
-# Data cleaning steps
-# Convert volumes to billions and round to two decimals
-columns_to_convert = ['all_time_volume', 'one_day_volume', 'seven_day_volume', 'thirty_day_volume', 'usd_liquidity']
-for col in columns_to_convert:
-    all_dex_data[col] = all_dex_data[col] / 1e9
-    all_dex_data[col] = all_dex_data[col].round(2)
+# Concatenate all datasets into a single DataFrame, then clean it:
+# - simplify the 'projects' column to count of projects (parsed in one vectorized pass)
+# - remove unnecessary columns (token addresses, pool_ids, projects)
+# - convert volumes to billions and round to two decimals
+all_dex_data = integrate(dex_datasets, scale=False)
 
-# Simplify the 'projects' column to count of projects
-all_dex_data['project_count'] = all_dex_data['projects'].apply(lambda x: len(eval(x)))
+# The pairs behind the boxplot outliers further below: IQR (1.5 x IQR beyond the quartiles)
+# and MAD (robust z-score above 3.5) flags per chain, and the top 5 pairs per chain and
+# metric, taken from the USD values before they are rounded to billions
+from dex_analysis.outliers import outliers, top_k
 
-# Remove unnecessary columns
-all_dex_data.drop(['token_a_address', 'token_b_address', 'pool_ids', 'projects'], axis=1, inplace=True)
+pair_outliers = outliers(all_dex_data)
+top_pairs = top_k(all_dex_data, k=5)
+all_dex_data = scale_metrics(all_dex_data)
 
 # Display the cleaned, integrated data
 print(all_dex_data.head())
@@ -99,26 +114,49 @@ print(all_dex_data.info())
 # In[3]:
 
 
-# Group data by 'chain' and aggregate with mean for basic metrics
-chain_aggregates = all_dex_data.groupby('chain').agg({
-    'one_day_volume': 'mean',
-    'seven_day_volume': 'mean',
-    'thirty_day_volume': 'mean',
-    'usd_liquidity': 'mean',
-    'project_count': 'mean'
-}).reset_index()
+from dex_analysis.features import chain_features
 
-# Feature Engineering
-# Volatility Index: Standard deviation of the different volume metrics normalized by the mean volume
-volume_columns = ['one_day_volume', 'seven_day_volume', 'thirty_day_volume']
-chain_aggregates['volume_std'] = all_dex_data[volume_columns].std(axis=1) / all_dex_data[volume_columns].mean(axis=1)
-
-# Liquidity Ratio: Liquidity to average volume ratio
-chain_aggregates['liquidity_ratio'] = chain_aggregates['usd_liquidity'] / chain_aggregates[volume_columns].mean(axis=1)
+# Group data by 'chain' and aggregate with mean for basic metrics, in one grouped pass:
+# - Volatility Index (volume_std): per-chain mean of each pair's standard deviation
+#   across the daily/weekly/monthly volumes, normalized by its mean volume
+# - seven_day_volume_liquidity_ratio: per-chain mean of the pair-level ratio
+# - Liquidity Ratio: liquidity to average volume ratio
+chain_aggregates = chain_features(all_dex_data)
 
 # Display the simplified dataset
 print(chain_aggregates.head())
 
+# With the aggregates taken from the float64 metrics, store chain/token_pair as
+# categoricals and downcast the metrics to float32 where every value stays within
+# half a cent of a billion, and show the memory saved
+all_dex_data, dtype_footprint = optimize_dtypes(all_dex_data)
+print(dtype_footprint)
+
+# For exports too large to concatenate in memory, the same per-chain features can be
+# computed chunk by chunk with bounded memory:
+#     from dex_analysis.streaming import stream_chain_aggregates
+#     chain_aggregates = stream_chain_aggregates(file_paths.values())
+# and when only some snapshots changed since the last run, only those chains are recomputed:
+#     from dex_analysis.incremental import refresh_chain_aggregates
+#     chain_aggregates, recomputed = refresh_chain_aggregates(file_paths)
+
+
+# Pair-level questions can be asked of a SQLite copy of all snapshots (kept in the data
+# directory's cache folder and reloaded only for chains whose file changed) instead of
+# rescanning the frames:
+
+# In[ ]:
+
+
+from dex_analysis.database import DexDatabase
+
+dex_db = DexDatabase.for_data_dir(DATA_DIR)
+dex_db.ingest(file_paths)
+
+# Top pairs by 7-day volume/liquidity ratio on Arbitrum, and liquidity by project (raw USD)
+print(dex_db.top_pairs('seven_day_volume_liquidity_ratio', chain='arbitrum', limit=10)[['token_pair', 'seven_day_volume_liquidity_ratio']])
+print(dex_db.liquidity_by_project(limit=10))
+
 
 # ## Exploratory Data Analysis (EDA) and Visualization
 # We'll analyze this combined dataset to uncover trends and differences across chains in trading volumes, liquidity, and project counts. Here's the plan for the EDA:
@@ -130,39 +168,21 @@ print(chain_aggregates.head())
 # In[4]:
 
 
-import seaborn as sns
 import matplotlib.pyplot as plt
-
-# Set the aesthetic style of the plots
-sns.set_style("whitegrid")
+from dex_analysis.plotting import plot_chain_bar, plot_project_count_impact, plot_volume_liquidity_boxplots
 
 # Volume and Liquidity Comparison Across Chains
-plt.figure(figsize=(16, 6))
-plt.subplot(1, 2, 1)
-sns.boxplot(x='chain', y='seven_day_volume', data=all_dex_data)
-plt.title('Comparison of 7-Day Trading Volume Across Chains')
-plt.ylabel('Volume (in billions)')
-plt.xlabel('Blockchain Chain')
-
-plt.subplot(1, 2, 2)
-sns.boxplot(x='chain', y='usd_liquidity', data=all_dex_data)
-plt.title('Comparison of USD Liquidity Across Chains')
-plt.ylabel('Liquidity (in billions)')
-plt.xlabel('Blockchain Chain')
-
-plt.tight_layout()
+plot_volume_liquidity_boxplots(all_dex_data)
 plt.show()
 
 # Analyzing Project Count Impact
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x='project_count', y='seven_day_volume', hue='chain', data=all_dex_data, palette='Set2', size='usd_liquidity', sizes=(20, 200))
-plt.title('Project Count Impact on 7-Day Volume and Liquidity')
-plt.xlabel('Number of Projects')
-plt.ylabel('7-Day Volume (in billions)')
-plt.grid(True)
-plt.legend(title='Chain')
+plot_project_count_impact(all_dex_data)
 plt.show()
 
+# The pairs behind the boxplot outliers (values in USD), and the top pairs per chain
+print(pair_outliers.sort_values(['metric', 'chain', 'value'], ascending=[True, True, False]))
+print(top_pairs)
+
 
 # ## Visual Analysis Results
 # The plots reveal several insights about trading volumes, liquidity, and the impact of project counts across different blockchain chains:
@@ -188,21 +208,16 @@ plt.show()
 
 
 # Visualizing liquidity ratio across chains
-plt.figure(figsize=(10, 6))
-sns.barplot(x='chain', y='liquidity_ratio', data=chain_aggregates)
-plt.title('Liquidity to Volume Ratio by Chain')
-plt.xlabel('Blockchain Chain')
-plt.ylabel('Liquidity to Volume Ratio')
+plot_chain_bar(chain_aggregates, 'liquidity_ratio', 'Liquidity to Volume Ratio by Chain', 'Liquidity to Volume Ratio')
 plt.show()
 
 # Visualizing average project count across chains
-plt.figure(figsize=(10, 6))
-sns.barplot(x='chain', y='project_count', data=chain_aggregates)
-plt.title('Average Number of Projects by Chain')
-plt.xlabel('Blockchain Chain')
-plt.ylabel('Average Project Count')
+plot_chain_bar(chain_aggregates, 'project_count', 'Average Number of Projects by Chain', 'Average Project Count')
 plt.show()
 
+# End of the traced pipeline; writes traces/dex_report_trace.json
+tracer.finish()
+
 
 # #### Market Efficiency: 
 # - The liquidity ratio highlights chains where liquidity is efficiently managed relative to trading volume. Higher ratios suggest more liquid markets, potentially offering smoother trading experiences.
@@ -231,59 +246,64 @@ plt.show()
 # In[9]:
 
 
-import dash
-from dash import html, dcc
-import plotly.express as px
-import pandas as pd
-
-# Initialize the Dash application
-app = dash.Dash(__name__)
-
-# Define custom color sequences for visualizations
-custom_colors = ['#0074D9', '#FF4136', '#2ECC40', '#FF851B', '#7FDBFF', '#B10DC9']
-
-# Create Plotly Express graphs for the dashboard
-fig_liquidity_ratio = px.bar(chain_aggregates, x='chain', y='liquidity_ratio', title='Liquidity to Volume Ratio by Chain',
-                             color='chain', color_discrete_sequence=custom_colors)
-fig_project_count = px.bar(chain_aggregates, x='chain', y='project_count', title='Average Number of Projects by Chain',
-                           color='chain', color_discrete_sequence=custom_colors)
-
-# Adding detailed visualizations for each chain
-fig_one_day_volume = px.bar(chain_aggregates, x='chain', y='one_day_volume', title='Average One-Day Volume by Chain',
-                            color='chain', color_discrete_sequence=custom_colors)
-fig_seven_day_volume = px.bar(chain_aggregates, x='chain', y='seven_day_volume', title='Average Seven-Day Volume by Chain',
-                              color='chain', color_discrete_sequence=custom_colors)
-
-# Define the layout of the app
-app.layout = html.Div(children=[
-    html.H1(children='DEX Data Dashboard'),
-
-    html.Div(children='''
-        A web dashboard for displaying DEX data metrics.
-    '''),
-
-    dcc.Graph(
-        id='liquidity-ratio-graph',
-        figure=fig_liquidity_ratio
-    ),
-
-    dcc.Graph(
-        id='project-count-graph',
-        figure=fig_project_count
-    ),
-
-    dcc.Graph(
-        id='one-day-volume-graph',
-        figure=fig_one_day_volume
-    ),
-
-    dcc.Graph(
-        id='seven-day-volume-graph',
-        figure=fig_seven_day_volume
-    )
-])
-
-# Run the server on a specified port
-if __name__ == '__main__':
-    app.run_server(debug=True, port=8051)  # Use a different port if 8050 is in use
+# dash and plotly are optional; without them the dashboard cell is skipped
+try:
+    import dash
+    from dash import html, dcc
+    import plotly.express as px
+except ImportError:
+    dash = None
+    print('dash is not installed; skipping the dashboard (pip install dash)')
+
+if dash is not None:
+    # Initialize the Dash application
+    app = dash.Dash(__name__)
+
+    # Define custom color sequences for visualizations
+    custom_colors = ['#0074D9', '#FF4136', '#2ECC40', '#FF851B', '#7FDBFF', '#B10DC9']
+
+    # Create Plotly Express graphs for the dashboard
+    fig_liquidity_ratio = px.bar(chain_aggregates, x='chain', y='liquidity_ratio', title='Liquidity to Volume Ratio by Chain',
+                                 color='chain', color_discrete_sequence=custom_colors)
+    fig_project_count = px.bar(chain_aggregates, x='chain', y='project_count', title='Average Number of Projects by Chain',
+                               color='chain', color_discrete_sequence=custom_colors)
+
+    # Adding detailed visualizations for each chain
+    fig_one_day_volume = px.bar(chain_aggregates, x='chain', y='one_day_volume', title='Average One-Day Volume by Chain',
+                                color='chain', color_discrete_sequence=custom_colors)
+    fig_seven_day_volume = px.bar(chain_aggregates, x='chain', y='seven_day_volume', title='Average Seven-Day Volume by Chain',
+                                  color='chain', color_discrete_sequence=custom_colors)
+
+    # Define the layout of the app
+    app.layout = html.Div(children=[
+        html.H1(children='DEX Data Dashboard'),
+
+        html.Div(children='''
+            A web dashboard for displaying DEX data metrics.
+        '''),
+
+        dcc.Graph(
+            id='liquidity-ratio-graph',
+            figure=fig_liquidity_ratio
+        ),
+
+        dcc.Graph(
+            id='project-count-graph',
+            figure=fig_project_count
+        ),
+
+        dcc.Graph(
+            id='one-day-volume-graph',
+            figure=fig_one_day_volume
+        ),
+
+        dcc.Graph(
+            id='seven-day-volume-graph',
+            figure=fig_seven_day_volume
+        )
+    ])
+
+    # Run the server on a specified port (development only; use `python -m dex_analysis.serve` to serve it to several users)
+    if __name__ == '__main__':
+        app.run(debug=True, port=8051)  # Use a different port if 8050 is in use
 
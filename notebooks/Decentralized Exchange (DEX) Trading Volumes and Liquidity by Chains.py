@@ -11,36 +11,33 @@
 
 
 # Import necessary libraries
+import os
 import pandas as pd
 import numpy as np
-
-# Data Loading
-def load_data(file_path):
-    return pd.read_csv(file_path)
-
-# Load datasets
-eth_data = load_data('Downloads/dex_data/dex_pairs_ethereum.csv')
-bnb_data = load_data('Downloads/dex_data/dex_pairs_bnb.csv')
-sol_data = load_data('Downloads/dex_data/dex_pairs_solana.csv')
-polygon_data = load_data('Downloads/dex_data/dex_pairs_polygon.csv')
-arbitrum_data = load_data('Downloads/dex_data/dex_pairs_arbitrum.csv')
-optimism_data = load_data('Downloads/dex_data/dex_pairs_optimism.csv')
-
-# Data Preprocessing
-def preprocess_data(data):
-    # Replace any inf or -inf with NaN
-    data.replace([np.inf, -np.inf], np.nan, inplace=True)
-    # Fill missing values
-    data.fillna(method='ffill', inplace=True)
-    return data
-
-# Preprocess each dataset
-eth_data = preprocess_data(eth_data)
-bnb_data = preprocess_data(bnb_data)
-sol_data = preprocess_data(sol_data)
-polygon_data = preprocess_data(polygon_data)
-arbitrum_data = preprocess_data(arbitrum_data)
-optimism_data = preprocess_data(optimism_data)
+from dex_analysis.data import ANALYSIS_COLUMNS, chain_paths
+from dex_analysis.parallel import preprocess_all
+from dex_analysis.instrument import PrintHook, Tracer
+
+# Report wall time, rows and memory of each pipeline stage, and save a JSON trace of the run
+tracer = Tracer(hooks=[PrintHook()], output='traces/dex_volumes_trace.json').start()
+
+# Data Loading and Preprocessing
+# Each chain is loaded through the columnar cache (skipping the pool/address lists)
+# and cleaned (inf -> NaN, forward fill). This runs at module level, where a process
+# pool cannot be started under the spawn/forkserver start methods (macOS, Windows,
+# Python 3.14+), so the chains are processed in-process; a script that calls
+# preprocess_all from behind an `if __name__ == '__main__':` guard can pass
+# max_workers=None to use one worker process per chain.
+DATA_DIR = os.environ.get('DEX_DATA_DIR', 'Downloads/dex_data')
+file_paths = chain_paths(DATA_DIR)
+chain_data = preprocess_all(file_paths, max_workers=1, columns=ANALYSIS_COLUMNS, scale=False)
+
+eth_data = chain_data['ethereum']
+bnb_data = chain_data['bnb']
+sol_data = chain_data['solana']
+polygon_data = chain_data['polygon']
+arbitrum_data = chain_data['arbitrum']
+optimism_data = chain_data['optimism']
 
 
 # ## Exploratory Data Analysis (EDA)
@@ -53,55 +50,32 @@ optimism_data = preprocess_data(optimism_data)
 
 # Import visualization libraries
 import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Set the aesthetic style of the plots
-sns.set_style("whitegrid")
-
-# Function to plot trading volumes
-def plot_trading_volumes(data, chain_name):
-    plt.figure(figsize=(14, 7))
-    plt.plot(data['one_day_volume'], label='Daily Volume')
-    plt.plot(data['seven_day_volume'], label='Weekly Volume')
-    plt.plot(data['thirty_day_volume'], label='Monthly Volume')
-    plt.title(f'Trading Volumes on {chain_name}')
-    plt.xlabel('Date')
-    plt.ylabel('Volume (in USD)')
-    plt.legend()
-    plt.show()
-
-# Function to plot liquidity
-def plot_liquidity(data, chain_name):
-    plt.figure(figsize=(14, 7))
-    plt.plot(data['usd_liquidity'], color='purple')
-    plt.title(f'Liquidity Over Time on {chain_name}')
-    plt.xlabel('Date')
-    plt.ylabel('USD Liquidity')
-    plt.show()
-
-# Plotting the data for Ethereum
-plot_trading_volumes(eth_data, 'Ethereum')
-plot_liquidity(eth_data, 'Ethereum')
 
-# Plotting the data for Ethereum
-plot_trading_volumes(bnb_data, 'Binance Smart Chain')
-plot_liquidity(bnb_data, 'Binance Smart Chain')
+# The plotting helpers return the figure; long series are reduced to ~2 points per pixel
+# (bucket min/max kept) before plotting
+from dex_analysis.plotting import compare_average_volumes, compare_liquidity, plot_liquidity, plot_trading_volumes
 
-# Plotting the data for Ethereum
-plot_trading_volumes(sol_data, 'Solana')
-plot_liquidity(sol_data, 'Solana')
+from dex_analysis.data import CHAIN_LABELS, CHAINS
 
-# Plotting the data for Ethereum
-plot_trading_volumes(polygon_data, 'Polygon')
-plot_liquidity(polygon_data, 'Polygon')
+# Trading volumes and liquidity of each chain
+for chain in CHAINS:
+    plot_trading_volumes(chain_data[chain], CHAIN_LABELS[chain])
+    plot_liquidity(chain_data[chain], CHAIN_LABELS[chain])
+    plt.show()
 
-# Plotting the data for Ethereum
-plot_trading_volumes(arbitrum_data, 'Arbitrum')
-plot_liquidity(arbitrum_data, 'Arbitrum')
+# The charts above plot the pairs of a single snapshot. Once dated snapshots have been
+# recorded (`python -m dex_analysis history --data-dir <DATA_DIR>`, e.g. daily), the
+# actual liquidity history of each chain is available:
+from dex_analysis.data import CHAIN_LABELS
+from dex_analysis.history import HistoryStore
+from dex_analysis.plotting import plot_history
 
-# Plotting the data for Ethereum
-plot_trading_volumes(optimism_data, 'Optimism')
-plot_liquidity(optimism_data, 'Optimism')
+history = HistoryStore.for_data_dir(DATA_DIR)
+for chain in history.chains():
+    if len(history.dates(chain)) > 1:
+        plot_history(history.chain_totals(chain), 'usd_liquidity', f'Total Liquidity Over Time on {CHAIN_LABELS[chain]}',
+                     'USD Liquidity')
+        plt.show()
 
 
 # ## Comparative Analysis
@@ -112,34 +86,18 @@ plot_liquidity(optimism_data, 'Optimism')
 # In[5]:
 
 
-# Function to compare average trading volumes
-def compare_average_volumes(*datasets, labels):
-    averages = [data[['one_day_volume', 'seven_day_volume', 'thirty_day_volume']].mean() for data in datasets]
-    df_averages = pd.DataFrame(averages, index=labels)
-    df_averages.plot(kind='bar', figsize=(14, 7))
-    plt.title('Comparison of Average Trading Volumes Across Blockchains')
-    plt.xlabel('Blockchain')
-    plt.ylabel('Average Volume (in USD)')
-    plt.legend(['Daily Volume', 'Weekly Volume', 'Monthly Volume'])
-    plt.show()
-
 # Compare trading volumes across all blockchains
 compare_average_volumes(eth_data, bnb_data, sol_data, polygon_data, arbitrum_data, optimism_data,
                         labels=['Ethereum', 'Binance Smart Chain', 'Solana', 'Polygon', 'Arbitrum', 'Optimism'])
-
-# Function to compare liquidity
-def compare_liquidity(*datasets, labels):
-    liquidity = [data['usd_liquidity'].mean() for data in datasets]
-    df_liquidity = pd.DataFrame(liquidity, index=labels, columns=['Average USD Liquidity'])
-    df_liquidity.plot(kind='bar', color='purple', figsize=(14, 7))
-    plt.title('Comparison of Average USD Liquidity Across Blockchains')
-    plt.xlabel('Blockchain')
-    plt.ylabel('USD Liquidity')
-    plt.show()
+plt.show()
 
 # Compare liquidity across all blockchains
 compare_liquidity(eth_data, bnb_data, sol_data, polygon_data, arbitrum_data, optimism_data,
                   labels=['Ethereum', 'Binance Smart Chain', 'Solana', 'Polygon', 'Arbitrum', 'Optimism'])
+plt.show()
+
+# End of the traced pipeline; writes traces/dex_volumes_trace.json
+tracer.finish()
 
 
 # ## Conclusion and Recommendations
@@ -166,70 +124,50 @@ compare_liquidity(eth_data, bnb_data, sol_data, polygon_data, arbitrum_data, opt
 
 
 # Import necessary libraries for the dashboard
-import dash
-import dash_core_components as dcc
-import dash_html_components as html
-from dash.dependencies import Input, Output
-
-# Create a Dash application
-app = dash.Dash(__name__)
-
-# Define the layout of the dashboard
-app.layout = html.Div([
-    html.H1('DEX Trading Volumes and Liquidity Dashboard'),
-    dcc.Dropdown(
-        id='chain-dropdown',
-        options=[
-            {'label': 'Ethereum', 'value': 'eth'},
-            {'label': 'Binance Smart Chain', 'value': 'bnb'},
-            {'label': 'Solana', 'value': 'sol'},
-            {'label': 'Polygon', 'value': 'polygon'},
-            {'label': 'Arbitrum', 'value': 'arbitrum'},
-            {'label': 'Optimism', 'value': 'optimism'}
-        ],
-        value='eth',
-        style={'width': '50%'}
-    ),
-    dcc.Graph(id='volume-graph'),
-    dcc.Graph(id='liquidity-graph')
-])
-
-# Define the callback to update the graph
-@app.callback(
-    [Output('volume-graph', 'figure'),
-     Output('liquidity-graph', 'figure')],
-    [Input('chain-dropdown', 'value')]
-)
-def update_graphs(selected_chain):
-    data_map = {
-        'eth': eth_data,
-        'bnb': bnb_data,
-        'sol': sol_data,
-        'polygon': polygon_data,
-        'arbitrum': arbitrum_data,
-        'optimism': optimism_data
-    }
-    data = data_map[selected_chain]
-    
-    # Create volume graph
-    volume_fig = {
-        'data': [
-            {'x': data.index, 'y': data['one_day_volume'], 'type': 'line', 'name': 'Daily Volume'},
-            {'x': data.index, 'y': data['seven_day_volume'], 'type': 'line', 'name': 'Weekly Volume'},
-            {'x': data.index, 'y': data['thirty_day_volume'], 'type': 'line', 'name': 'Monthly Volume'}
-        ],
-        'layout': {'title': 'Trading Volumes'}
-    }
-    
-    # Create liquidity graph
-    liquidity_fig = {
-        'data': [{'x': data.index, 'y': data['usd_liquidity'], 'type': 'line', 'name': 'USD Liquidity'}],
-        'layout': {'title': 'USD Liquidity'}
-    }
-    
-    return volume_fig, liquidity_fig
-
-# Run the server on a specified port
-if __name__ == '__main__':
-    app.run_server(debug=True, port=8053)  # Use a different port if 8050 is in use
+# (dash is optional; without it the dashboard cell is skipped)
+try:
+    import dash
+    from dash import dcc, html
+    from dash.dependencies import Input, Output
+except ImportError:
+    dash = None
+    print('dash is not installed; skipping the dashboard (pip install dash)')
+
+from dex_analysis.data import CHAIN_LABELS
+from dex_analysis.figures import FigureCache
+
+if dash is not None:
+    # Create a Dash application
+    app = dash.Dash(__name__)
+
+    # Per-chain figure payloads, built once at startup; a dropdown change is a cache lookup
+    figure_cache = FigureCache(chain_data.__getitem__)
+    figure_cache.warm(chain_data)
+
+    # Define the layout of the dashboard
+    app.layout = html.Div([
+        html.H1('DEX Trading Volumes and Liquidity Dashboard'),
+        dcc.Dropdown(
+            id='chain-dropdown',
+            options=[{'label': CHAIN_LABELS[chain], 'value': chain} for chain in chain_data],
+            value='ethereum',
+            style={'width': '50%'}
+        ),
+        dcc.Graph(id='volume-graph'),
+        dcc.Graph(id='liquidity-graph')
+    ])
+
+    # Define the callback to update the graph
+    @app.callback(
+        [Output('volume-graph', 'figure'),
+         Output('liquidity-graph', 'figure')],
+        [Input('chain-dropdown', 'value')]
+    )
+    def update_graphs(selected_chain):
+        volume_fig, liquidity_fig = figure_cache.get(selected_chain)
+        return volume_fig, liquidity_fig
+
+    # Run the server on a specified port (development only; use `python -m dex_analysis.serve` to serve it to several users)
+    if __name__ == '__main__':
+        app.run(debug=True, port=8053)  # Use a different port if 8050 is in use
 
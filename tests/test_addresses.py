@@ -0,0 +1,61 @@
+# addresses: the shared token/pool dictionary
+import numpy as np
+import pandas as pd
+
+from dex_analysis import addresses
+from dex_analysis.addresses import AddressIndex, encode_pairs
+
+EVM = '0xAbC0000000000000000000000000000000000001'
+SOLANA = 'So11111111111111111111111111111111111111112'
+
+
+def test_each_distinct_address_is_normalized_once(monkeypatch):
+    calls = []
+
+    def counting(values):
+        calls.append(list(values))
+        return normalize(values)
+
+    normalize = addresses.normalize_addresses
+    monkeypatch.setattr(addresses, 'normalize_addresses', counting)
+    values = [EVM, SOLANA, EVM, EVM.lower(), SOLANA, EVM] * 1000
+    codes = AddressIndex().encode(values)
+    assert len(calls) == 1
+    assert sorted(calls[0]) == sorted({EVM, EVM.lower(), SOLANA})
+    assert codes.tolist() == [0, 1, 0, 0, 1, 0] * 1000
+
+
+def test_blanks_are_never_indexed():
+    index = AddressIndex()
+    codes = index.encode([EVM, '', None, np.nan, pd.NA, EVM])
+    assert codes.dtype == np.int32
+    assert codes.tolist() == [0, -1, -1, -1, -1, 0]
+    assert len(index) == 1
+    assert '' not in index
+    assert index.lookup(['', None]).tolist() == [-1, -1]
+
+
+def test_mixed_case_evm_addresses_collapse():
+    index = AddressIndex()
+    codes = index.encode([EVM, EVM.lower(), EVM.upper().replace('0X', '0x'), SOLANA, SOLANA.lower()])
+    # EVM hex is case-insensitive, base58 is not
+    assert codes.tolist() == [0, 0, 0, 1, 2]
+    assert index.decode([0, 1]).tolist() == [EVM.lower(), SOLANA]
+    assert EVM in index
+    assert index.lookup([EVM.upper().replace('0X', '0x'), 'unknown']).tolist() == [0, -1]
+
+
+def test_encode_pairs_shares_ids_between_tokens_and_pools():
+    index = AddressIndex()
+    data = pd.DataFrame({
+        'token_a_address': [EVM, SOLANA],
+        'token_b_address': ['0xdef', ''],
+        'pool_ids': [repr(['0xPOOL', '0xdef']), '[]'],
+    })
+    encoded = encode_pairs(data, index, chain_code=3)
+    assert encoded.chain.tolist() == [3, 3]
+    assert encoded.token_a.tolist() == [0, 1]
+    assert encoded.token_b.tolist() == [2, -1]
+    assert encoded.pool_offsets.tolist() == [0, 2, 2]
+    assert encoded.pools.tolist() == [3, 2]
+    assert index.decode(encoded.pools).tolist() == ['0xpool', '0xdef']
@@ -0,0 +1,30 @@
+# cache: atomic writes through per-writer temp files
+import os
+
+import pytest
+
+from dex_analysis import cache
+
+
+def test_temp_paths_are_unique_siblings(tmp_path):
+    path = str(tmp_path / 'dex_pairs_bnb.json')
+    first, second = cache.temp_path(path), cache.temp_path(path)
+    assert first != second
+    assert os.path.dirname(first) == str(tmp_path)
+    assert first.startswith(f'{path}.{os.getpid()}.')
+
+
+def test_replace_atomic_cleans_up_failed_writes(tmp_path):
+    path = str(tmp_path / 'meta.json')
+    cache.write_json(path, {'size': 1})
+    assert cache.read_json(path) == {'size': 1}
+
+    def fail(target):
+        with open(target, 'w') as f:
+            f.write('partial')
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        cache.replace_atomic(path, fail)
+    assert cache.read_json(path) == {'size': 1}
+    assert os.listdir(tmp_path) == ['meta.json']
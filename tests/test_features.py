@@ -0,0 +1,59 @@
+# chain_features: per-chain volume volatility index
+#
+# The notebooks used to assign the row-level coefficient of variation
+# straight into chain_aggregates, so chain i received the value of row i
+# instead of its own mean. These tests pin the per-chain means.
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis.data import VOLUME_COLUMNS
+from dex_analysis.features import chain_features
+
+
+def unified_frame():
+    return pd.DataFrame({
+        'chain': ['bnb', 'ethereum', 'bnb', 'ethereum'],
+        'one_day_volume': [1.0, 2.0, 1.0, 0.0],
+        'seven_day_volume': [2.0, 2.0, 1.0, 3.0],
+        'thirty_day_volume': [3.0, 2.0, 4.0, 3.0],
+        'usd_liquidity': [1.0, 2.0, 3.0, 4.0],
+        'project_count': [1, 2, 3, 4],
+        'seven_day_volume_liquidity_ratio': [0.5, 1.0, 1.5, 2.0]
+    })
+
+
+def test_volume_std_is_the_per_chain_mean():
+    data = unified_frame()
+    result = chain_features(data).set_index('chain')
+    # Row coefficients of variation: bnb 0.5 and sqrt(3)/2, ethereum 0 and sqrt(3)/2
+    half_root3 = np.sqrt(3) / 2
+    assert result.loc['bnb', 'volume_std'] == pytest.approx((0.5 + half_root3) / 2)
+    assert result.loc['ethereum', 'volume_std'] == pytest.approx(half_root3 / 2)
+
+    # The old assignment aligned the row-level series with the chain rows by index
+    row_cv = data[VOLUME_COLUMNS].std(axis=1) / data[VOLUME_COLUMNS].mean(axis=1)
+    misaligned = row_cv.iloc[:len(result)].to_numpy()
+    assert not np.allclose(result['volume_std'].to_numpy(), misaligned)
+
+
+def test_volume_std_skips_missing_windows():
+    data = unified_frame()
+    data.loc[0, 'thirty_day_volume'] = np.nan
+    result = chain_features(data).set_index('chain')
+    # Row 0 keeps two windows (1, 2): std sqrt(0.5), mean 1.5
+    assert result.loc['bnb', 'volume_std'] == pytest.approx((np.sqrt(0.5) / 1.5 + np.sqrt(3) / 2) / 2)
+
+
+def test_non_finite_values_are_skipped():
+    data = unified_frame()
+    data.loc[0, 'thirty_day_volume'] = np.inf
+    data.loc[2, 'usd_liquidity'] = -np.inf
+    data.loc[3, 'seven_day_volume_liquidity_ratio'] = np.nan
+    result = chain_features(data).set_index('chain')
+    # An inf window is dropped like a missing one: row 0 keeps (1, 2)
+    assert result.loc['bnb', 'volume_std'] == pytest.approx((np.sqrt(0.5) / 1.5 + np.sqrt(3) / 2) / 2)
+    assert result.loc['bnb', 'thirty_day_volume'] == pytest.approx(4.0)
+    assert result.loc['bnb', 'usd_liquidity'] == pytest.approx(1.0)
+    assert result.loc['ethereum', 'seven_day_volume_liquidity_ratio'] == pytest.approx(1.0)
+    assert np.isfinite(result.drop(columns='liquidity_ratio').to_numpy()).all()
@@ -0,0 +1,93 @@
+# fetch: concurrent snapshot downloads against the local feed
+import filecmp
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from dex_analysis import feed  # noqa: E402
+from dex_analysis.cli import main  # noqa: E402
+from dex_analysis.data import CHAINS, chain_path  # noqa: E402
+from dex_analysis.fetch import fetch_snapshots  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'dex_data')
+
+
+# Draws for the feed's fail-rate check: a value below fail_rate answers 503
+class Draws:
+    def __init__(self, values):
+        self.values = list(values)
+        self.lock = threading.Lock()
+
+    def random(self):
+        with self.lock:
+            return self.values.pop(0) if self.values else 1.0
+
+
+@pytest.fixture
+def serve_feed():
+    servers = []
+
+    def start(**options):
+        server, base_url = feed.start_feed(DATA_DIR, **options)
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_flaky_feed_downloads_every_chain(tmp_path, serve_feed):
+    base_url = serve_feed(fail_rate=0.3)
+    results = fetch_snapshots(base_url, str(tmp_path), retries=10, backoff=0.0)
+    assert {chain: result.status for chain, result in results.items()} == {chain: 'updated' for chain in CHAINS}
+    for chain in CHAINS:
+        assert filecmp.cmp(chain_path(str(tmp_path), chain), chain_path(DATA_DIR, chain), shallow=False)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_503_is_retried(tmp_path, serve_feed, monkeypatch):
+    monkeypatch.setattr(feed, 'random', Draws([0.0, 0.0]))
+    base_url = serve_feed(fail_rate=0.5)
+    result = fetch_snapshots(base_url, str(tmp_path), chains=['bnb'], retries=3, backoff=0.0)['bnb']
+    assert (result.status, result.attempts) == ('updated', 3)
+
+    monkeypatch.setattr(feed, 'random', Draws([0.0] * 10))
+    result = fetch_snapshots(base_url, str(tmp_path / 'other'), chains=['bnb'], retries=2, backoff=0.0)['bnb']
+    assert (result.status, result.attempts, result.error) == ('failed', 3, 'HTTP 503')
+    assert not os.path.exists(chain_path(str(tmp_path / 'other'), 'bnb'))
+
+
+def test_404_is_not_retried(tmp_path, serve_feed):
+    base_url = serve_feed()
+    result = fetch_snapshots(base_url, str(tmp_path), chains=['fantom'], retries=3, backoff=0.0)['fantom']
+    assert (result.status, result.attempts) == ('failed', 1)
+    assert '404' in result.error
+
+
+def test_unchanged_snapshots_answer_304(tmp_path, serve_feed):
+    base_url = serve_feed()
+    fetch_snapshots(base_url, str(tmp_path), chains=['bnb', 'solana'])
+    mtime = os.stat(chain_path(str(tmp_path), 'bnb')).st_mtime_ns
+    results = fetch_snapshots(base_url, str(tmp_path), chains=['bnb', 'solana'])
+    assert {result.status for result in results.values()} == {'not_modified'}
+    assert os.stat(chain_path(str(tmp_path), 'bnb')).st_mtime_ns == mtime
+
+    # A local file that no longer matches the stored fingerprint is downloaded again
+    with open(chain_path(str(tmp_path), 'bnb'), 'a') as f:
+        f.write('\n')
+    results = fetch_snapshots(base_url, str(tmp_path), chains=['bnb', 'solana'])
+    assert (results['bnb'].status, results['solana'].status) == ('updated', 'not_modified')
+
+
+def test_cli_exits_1_when_every_chain_fails(tmp_path, serve_feed, capsys):
+    base_url = serve_feed(fail_rate=1.0)
+    assert main(['fetch', '--base-url', base_url, '--data-dir', str(tmp_path), '--retries', '0']) == 1
+    assert capsys.readouterr().out.count('failed') == len(CHAINS)
+
+    base_url = serve_feed()
+    assert not main(['fetch', '--base-url', base_url, '--data-dir', str(tmp_path), '--chains', 'bnb'])
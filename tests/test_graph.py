@@ -0,0 +1,83 @@
+# graph: per-chain token liquidity graphs on a hand-built pair table
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis.graph import build_graphs, components, hub_tokens, route, token_overlap
+
+USDC, WETH, PEPE, DAI = '0xusdc', '0xweth', '0xpepe', '0xdai'
+AAA, BBB, WBNB = '0xaaa', '0xbbb', '0xwbnb'
+
+
+def pairs(rows):
+    return pd.DataFrame(rows, columns=['token_a_address', 'token_b_address', 'usd_liquidity'])
+
+
+# Ethereum: USDC/WETH/PEPE/DAI form one component, AAA/BBB another. The
+# widest and the cheapest USDC -> PEPE route both go through WETH.
+def datasets():
+    ethereum = pairs([
+        ('0xUSDC', WETH, 100.0),
+        (WETH, USDC, 20.0),      # second pool, reversed orientation
+        (WETH, PEPE, 10.0),
+        (USDC, DAI, 50.0),
+        (DAI, PEPE, 1.0),
+        (USDC, PEPE, 0.5),
+        (AAA, BBB, 5.0),
+        # Left out: self-pair, no liquidity, missing liquidity, blank address
+        (WETH, WETH, 7.0),
+        (DAI, WETH, 0.0),
+        (DAI, AAA, np.nan),
+        ('', USDC, 3.0),
+    ])
+    bnb = pairs([(USDC, WBNB, 30.0)])
+    return {'ethereum': ethereum, 'bnb': bnb}
+
+
+def test_graph_shape_and_components():
+    index, graphs = build_graphs(datasets())
+    ethereum = graphs['ethereum']
+    assert ethereum.pair_count == 11
+    assert len(ethereum) == 6
+    assert ethereum.edge_count == 6
+    labels, summary = components(ethereum)
+    assert summary['tokens'].tolist() == [4, 2]
+    assert summary['edges'].tolist() == [5, 1]
+    assert summary['usd_liquidity'].tolist() == pytest.approx([181.5, 5.0])
+    nodes = ethereum.local(index.lookup([USDC, PEPE, AAA, BBB]))
+    assert labels[nodes[0]] == labels[nodes[1]] != labels[nodes[2]] == labels[nodes[3]]
+
+
+def test_hub_ranking():
+    index, graphs = build_graphs(datasets())
+    hubs = hub_tokens(graphs['ethereum'], index, k=3)
+    assert hubs['address'].tolist() == [USDC, WETH, DAI]
+    assert hubs['counterparties'].tolist() == [3, 2, 2]
+    assert hubs['usd_liquidity'].tolist() == pytest.approx([170.5, 130.0, 51.0])
+    assert hubs['liquidity_share'].iloc[0] == pytest.approx(170.5 / 186.5)
+
+
+@pytest.mark.parametrize('method', ['widest', 'cost'])
+def test_known_route(method):
+    index, graphs = build_graphs(datasets())
+    hops = route(graphs['ethereum'], index, '0xUSDC', PEPE, method=method)
+    assert hops['from_address'].tolist() == [USDC, WETH]
+    assert hops['to_address'].tolist() == [WETH, PEPE]
+    assert hops['usd_liquidity'].tolist() == pytest.approx([120.0, 10.0])
+
+
+def test_missing_routes_are_empty():
+    index, graphs = build_graphs(datasets())
+    assert route(graphs['ethereum'], index, USDC, AAA).empty
+    assert route(graphs['ethereum'], index, USDC, WBNB).empty
+    assert route(graphs['ethereum'], index, USDC, '0xunknown').empty
+    with pytest.raises(ValueError):
+        route(graphs['ethereum'], index, USDC, PEPE, method='shortest')
+
+
+def test_token_ids_are_shared_across_chains():
+    _, graphs = build_graphs(datasets())
+    overlap = token_overlap(graphs)
+    assert overlap.loc['ethereum', 'ethereum'] == 6
+    assert overlap.loc['bnb', 'bnb'] == 2
+    assert overlap.loc['ethereum', 'bnb'] == overlap.loc['bnb', 'ethereum'] == 1
@@ -0,0 +1,81 @@
+# history: delta-encoded snapshots replayed back to full states
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis import cache
+from dex_analysis.history import HistoryStore, snapshot_state
+
+SOURCE = os.path.join(os.path.dirname(__file__), os.pardir, 'dex_data', 'dex_pairs_bnb.csv')
+DATES = ['2024-05-07', '2024-05-08', '2024-05-09']
+
+
+# Three dumps of one chain: the original, one with a changed and a removed
+# pair, and one where a new pair is listed
+@pytest.fixture
+def snapshots(tmp_path):
+    first = pd.read_csv(SOURCE)
+    second = first.copy()
+    second.loc[0, 'usd_liquidity'] = second.loc[0, 'usd_liquidity'] * 2
+    removed = second.iloc[5]
+    second = second.drop(index=5)
+    third = pd.concat([second, first.iloc[[1]].assign(token_a_address='0xNEW', token_pair='NEW/WBNB')],
+                      ignore_index=True)
+    paths = []
+    for date, frame in zip(DATES, [first, second, third]):
+        os.makedirs(tmp_path / date)
+        path = str(tmp_path / date / 'dex_pairs_bnb.csv')
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths, removed
+
+
+def expected_state(path):
+    return snapshot_state(cache.load_data(path))
+
+
+def test_snapshots_replay_to_the_original_frames(tmp_path, snapshots):
+    paths, removed = snapshots
+    store = HistoryStore(str(tmp_path / 'history'))
+    entries = [store.ingest('bnb', path, date) for path, date in zip(paths, DATES)]
+    assert [entry['changed'] for entry in entries] == [35, 1, 1]
+    assert [entry['removed'] for entry in entries] == [0, 1, 0]
+    assert store.dates('bnb') == DATES
+    for path, date in zip(paths, DATES):
+        pd.testing.assert_frame_equal(store.snapshot('bnb', date), expected_state(path), check_dtype=False)
+    # Before the first snapshot there is no state
+    assert store.snapshot('bnb', '2024-05-01').empty
+
+
+def test_removed_pairs_are_tombstoned(tmp_path, snapshots):
+    paths, removed = snapshots
+    store = HistoryStore(str(tmp_path / 'history'))
+    store.ingest_all({'bnb': paths[0]}, DATES[0])
+    store.ingest_all({'bnb': paths[1]}, DATES[1])
+    key = f"{removed['token_a_address'].lower()}:{removed['token_b_address'].lower()}"
+    changes = pd.read_parquet(tmp_path / 'history' / 'bnb' / f'{DATES[1]}.parquet')
+    tombstone = changes[changes['removed']]
+    assert tombstone['pair_key'].tolist() == [key]
+    assert tombstone['usd_liquidity'].isna().all()
+
+    store.ingest('bnb', paths[2], DATES[2])
+    series = store.series('bnb', key, columns=['usd_liquidity'])
+    assert series['usd_liquidity'].iloc[0] == pytest.approx(removed['usd_liquidity'])
+    assert series['usd_liquidity'].iloc[1:].isna().all()
+    assert key not in set(store.latest('bnb')['pair_key'])
+
+
+def test_snapshots_must_be_ingested_in_date_order(tmp_path, snapshots):
+    paths, _ = snapshots
+    store = HistoryStore(str(tmp_path / 'history'))
+    store.ingest('bnb', paths[1], DATES[1])
+    # The same dump again is a no-op, an older date is rejected
+    assert store.ingest('bnb', paths[1], DATES[2]) is None
+    with pytest.raises(ValueError, match='date order'):
+        store.ingest('bnb', paths[0], DATES[0])
+    with pytest.raises(ValueError, match='date order'):
+        store.ingest('bnb', paths[2], DATES[1])
+    assert store.dates('bnb') == [DATES[1]]
+    assert np.isfinite(store.chain_totals('bnb')['usd_liquidity']).all()
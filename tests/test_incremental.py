@@ -0,0 +1,75 @@
+# incremental: per-chain partials persisted between refreshes
+import os
+
+import numpy as np
+import pandas as pd
+
+from dex_analysis.data import FEATURE_COLUMNS
+from dex_analysis.incremental import AggregateStore, refresh_chain_aggregates
+from dex_analysis.streaming import stream_chain_aggregates
+
+CHAINS = ['bnb', 'ethereum', 'solana']
+
+
+def write_chain(directory, chain, seed):
+    rng = np.random.default_rng(seed)
+    n = 25
+    data = pd.DataFrame({
+        'chain': chain,
+        'projects': [repr(['uniswap', 'curve', 'balancer'][:i % 4]) for i in range(n)],
+        'all_time_volume': rng.uniform(0, 5e12, n),
+        'one_day_volume': rng.uniform(0, 5e9, n),
+        'seven_day_volume': rng.uniform(0, 5e10, n),
+        'thirty_day_volume': rng.uniform(0, 5e11, n),
+        'usd_liquidity': rng.uniform(0, 5e9, n),
+        'seven_day_volume_liquidity_ratio': rng.uniform(0, 10, n),
+    })
+    data.loc[2, 'usd_liquidity'] = np.inf
+    data.loc[4, 'one_day_volume'] = np.nan
+    path = os.path.join(directory, f'dex_pairs_{chain}.csv')
+    data.to_csv(path, index=False)
+    return path
+
+
+def assert_matches_full_recompute(result, file_paths):
+    expected = stream_chain_aggregates(list(file_paths.values()), chunksize=10).set_index('chain')
+    result = result.set_index('chain')
+    assert sorted(result.index) == sorted(expected.index)
+    for col in FEATURE_COLUMNS + ['liquidity_ratio']:
+        assert np.isfinite(result[col]).all(), col
+        np.testing.assert_allclose(result[col], expected.loc[result.index, col], rtol=1e-9, err_msg=col)
+
+
+def test_only_the_changed_chain_is_recomputed(tmp_path):
+    file_paths = {chain: write_chain(str(tmp_path), chain, seed) for seed, chain in enumerate(CHAINS)}
+    result, changed = refresh_chain_aggregates(file_paths, chunksize=10)
+    assert sorted(changed) == CHAINS
+    assert os.path.exists(tmp_path / '.cache' / 'chain_aggregates.json')
+    assert_matches_full_recompute(result, file_paths)
+
+    _, changed = refresh_chain_aggregates(file_paths, chunksize=10)
+    assert changed == []
+
+    # A touched file with the same content is matched by its hash
+    os.utime(file_paths['ethereum'], ns=(1, 1))
+    _, changed = refresh_chain_aggregates(file_paths, chunksize=10)
+    assert changed == []
+
+    write_chain(str(tmp_path), 'solana', seed=99)
+    result, changed = refresh_chain_aggregates(file_paths, chunksize=10)
+    assert changed == ['solana']
+    assert_matches_full_recompute(result, file_paths)
+
+    # The persisted partials reload to the same result
+    store = AggregateStore.for_data_dir(str(tmp_path))
+    assert_matches_full_recompute(store.chain_aggregates(), file_paths)
+
+
+def test_unlisted_chains_are_dropped(tmp_path):
+    file_paths = {chain: write_chain(str(tmp_path), chain, seed) for seed, chain in enumerate(CHAINS)}
+    store = AggregateStore(str(tmp_path / 'store.json'))
+    store.refresh(file_paths)
+    del file_paths['bnb']
+    assert store.refresh(file_paths) == []
+    assert sorted(store.entries) == ['ethereum', 'solana']
+    assert_matches_full_recompute(store.chain_aggregates(), file_paths)
@@ -0,0 +1,67 @@
+# listcols: vectorized parsing of the stringified list columns
+#
+# Every case is checked against ast.literal_eval, the per-row parse the
+# notebooks used, on both the pyarrow kernels and the pandas fallback.
+import ast
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis import listcols
+
+CELLS = [
+    repr([]),
+    repr(['uniswap']),
+    repr(['uniswap', 'sushiswap', '0x API']),
+    repr(["dodo's pool", 'curve']),
+    repr(['say "hi"', 'balancer']),
+    repr(['a, b', 'c']),
+    repr(["it's", 'x, y', 'pancakeswap']),
+    np.nan,
+    None,
+]
+
+
+@pytest.fixture(params=['arrow', 'pandas'])
+def backend(request, monkeypatch):
+    if request.param == 'pandas':
+        monkeypatch.setattr(listcols, 'pa', None)
+    elif listcols.pa is None:
+        pytest.skip('pyarrow is not installed')
+    return request.param
+
+
+def expected_lists(cells):
+    return [ast.literal_eval(cell) if isinstance(cell, str) else [] for cell in cells]
+
+
+@pytest.mark.parametrize('dtype', [object, 'string'])
+def test_parse_matches_literal_eval(backend, dtype):
+    series = pd.Series(CELLS, dtype=dtype, name='projects')
+    parsed = listcols.parse_list_column(series)
+    expected = expected_lists(CELLS)
+    assert parsed.counts.tolist() == [len(items) for items in expected]
+    assert [str(value) for value in parsed.values] == [item for items in expected for item in items]
+
+
+def test_count_matches_literal_eval(backend):
+    series = pd.Series(CELLS, dtype=object)
+    expected = [len(items) for items in expected_lists(CELLS)]
+    assert listcols.count_list_items(series).tolist() == expected
+    assert listcols.parse_list_column(series, values=False).counts.tolist() == expected
+
+
+def test_all_missing_or_empty(backend):
+    series = pd.Series([np.nan, '[]', None], dtype=object)
+    parsed = listcols.parse_list_column(series)
+    assert parsed.counts.tolist() == [0, 0, 0]
+    assert len(parsed.values) == 0
+    assert listcols.count_list_items(series).tolist() == [0, 0, 0]
+
+
+def test_explode_keeps_row_labels(backend):
+    series = pd.Series([repr(['a', 'b']), np.nan, repr(['c'])], index=[10, 11, 12], name='projects')
+    exploded = listcols.explode_list_column(series)
+    assert exploded['row'].tolist() == [10, 10, 12]
+    assert exploded['projects'].astype(str).tolist() == ['a', 'b', 'c']
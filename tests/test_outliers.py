@@ -0,0 +1,128 @@
+# outliers: per-chain top-K and IQR/MAD flags against a pandas reference
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis.outliers import (IQR_K, MAD_SCALE, MAD_THRESHOLD, OUTLIER_METRICS, flag_outliers, outliers,
+                                   robust_stats, top_k)
+
+
+def random_pairs(rows=3000, seed=1):
+    rng = np.random.default_rng(seed)
+    chains = np.array(['arbitrum', 'bnb', 'ethereum', 'solana'])
+    data = pd.DataFrame({
+        'chain': pd.Categorical(chains[rng.integers(0, len(chains), rows)]),
+        'token_pair': [f'PAIR-{i % 500}' for i in range(rows)],
+        # Heavy tails so every chain has outliers, rounded so there are ties
+        'seven_day_volume': np.round(rng.lognormal(2, 1.5, rows), 1),
+        'usd_liquidity': np.round(rng.lognormal(1, 2, rows), 2),
+        'seven_day_volume_liquidity_ratio': rng.standard_t(2, rows),
+    })
+    data.loc[::97, 'usd_liquidity'] = np.nan
+    data.loc[::131, 'seven_day_volume'] = np.inf
+    return data
+
+
+def reference_top_k(data, k):
+    frames = []
+    for metric in OUTLIER_METRICS:
+        finite = data[np.isfinite(data[metric])]
+        top = finite.groupby('chain', observed=True)[metric].nlargest(k)
+        frames.append(pd.DataFrame({'chain': top.index.get_level_values(0).astype(str), 'metric': metric,
+                                    'value': top.to_numpy(), 'row': top.index.get_level_values(1)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+# Quartiles, median and MAD from pandas groupby quantiles; non-finite values
+# are left out and never flagged, chains with a zero IQR or MAD are not flagged
+def reference_flags(data):
+    flags = {}
+    for metric in OUTLIER_METRICS:
+        values = data[metric].where(np.isfinite(data[metric]))
+        grouped = values.groupby(data['chain'], observed=True)
+        q1 = grouped.transform(lambda v: v.quantile(0.25))
+        q3 = grouped.transform(lambda v: v.quantile(0.75))
+        median = grouped.transform('median')
+        mad = (values - median).abs().groupby(data['chain'], observed=True).transform('median')
+        iqr = q3 - q1
+        flags[f'{metric}_iqr'] = ((values < q1 - IQR_K * iqr) | (values > q3 + IQR_K * iqr)) & (iqr != 0)
+        flags[f'{metric}_mad'] = ((MAD_SCALE * (values - median) / mad).abs() > MAD_THRESHOLD) & (mad != 0)
+    return pd.DataFrame(flags)
+
+
+def test_stats_match_pandas_quantiles():
+    data = random_pairs()
+    stats = robust_stats(data).set_index(['chain', 'metric'])
+    for metric in OUTLIER_METRICS:
+        values = data[metric].where(np.isfinite(data[metric]))
+        grouped = values.groupby(data['chain'], observed=True)
+        for chain, group in grouped:
+            row = stats.loc[(chain, metric)]
+            group = group.dropna()
+            assert row['count'] == len(group)
+            assert row['q1'] == pytest.approx(group.quantile(0.25))
+            assert row['median'] == pytest.approx(group.median())
+            assert row['q3'] == pytest.approx(group.quantile(0.75))
+            assert row['mad'] == pytest.approx((group - group.median()).abs().median())
+            assert row['upper_fence'] == pytest.approx(row['q3'] + IQR_K * row['iqr'])
+
+
+def test_flags_match_pandas_reference():
+    data = random_pairs()
+    expected = reference_flags(data)
+    flags = flag_outliers(data)
+    pd.testing.assert_frame_equal(flags[expected.columns], expected, check_names=False)
+    assert expected.to_numpy().any()
+    # Precomputed statistics give the same flags
+    pd.testing.assert_frame_equal(flag_outliers(data, stats=robust_stats(data)), flags)
+
+
+def test_top_k_matches_nlargest():
+    data = random_pairs()
+    result = top_k(data, k=10)
+    expected = reference_top_k(data, 10)
+    for metric in OUTLIER_METRICS:
+        got = result[result['metric'] == metric].sort_values(['chain', 'rank'])
+        want = expected[expected['metric'] == metric].sort_values('chain', kind='stable')
+        assert list(got['row']) == list(want['row']), metric
+        assert list(got['value']) == list(want['value']), metric
+
+
+def test_zero_spread_is_never_flagged():
+    # Over half of each chain shares one value: IQR and MAD are both zero
+    data = pd.DataFrame({
+        'chain': ['bnb'] * 8 + ['solana'] * 8,
+        'token_pair': [f'PAIR-{i}' for i in range(16)],
+        'seven_day_volume': [5.0] * 7 + [1e12] + [5.0] * 6 + [0.0, 1e12],
+        'usd_liquidity': [1.0] * 16,
+        'seven_day_volume_liquidity_ratio': [1.0] * 15 + [-1e9],
+    })
+    stats = robust_stats(data).set_index(['chain', 'metric'])
+    assert stats.loc[('bnb', 'seven_day_volume'), 'iqr'] == 0
+    assert stats.loc[('bnb', 'seven_day_volume'), 'mad'] == 0
+    assert not flag_outliers(data).to_numpy().any()
+    assert outliers(data).empty
+
+
+def test_fences_are_per_chain():
+    # 100 is far outside bnb's range but typical on ethereum
+    rng = np.random.default_rng(3)
+    data = pd.DataFrame({
+        'chain': ['bnb'] * 50 + ['ethereum'] * 50 + [None],
+        'token_pair': [f'PAIR-{i}' for i in range(101)],
+        'seven_day_volume': np.concatenate([rng.uniform(1, 2, 50), rng.uniform(50, 150, 50), [1e9]]),
+        'usd_liquidity': 1.0,
+        'seven_day_volume_liquidity_ratio': 1.0,
+    })
+    data.loc[[10, 60], 'seven_day_volume'] = 100.0
+    flags = flag_outliers(data, metrics=['seven_day_volume'])
+    assert flags.loc[10, 'seven_day_volume_iqr'] and flags.loc[10, 'seven_day_volume_mad']
+    assert not flags.loc[60].any()
+    # Rows without a chain have no fences
+    assert not flags.loc[100].any()
+
+    alerts = outliers(data, metrics=['seven_day_volume'])
+    assert set(alerts['row']) == {10}
+    stats = robust_stats(data, metrics=['seven_day_volume']).set_index('chain')
+    iqr_alert = alerts[alerts['method'] == 'iqr'].iloc[0]
+    assert iqr_alert['score'] == pytest.approx((100.0 - stats.loc['bnb', 'median']) / stats.loc['bnb', 'iqr'])
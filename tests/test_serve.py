@@ -0,0 +1,37 @@
+# serve: readiness of the preloaded dashboard server
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dash')
+
+from dex_analysis import serve  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'dex_data')
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for chain in ('bnb', 'solana'):
+        shutil.copy(os.path.join(DATA_DIR, f'dex_pairs_{chain}.csv'), tmp_path)
+    return str(tmp_path)
+
+
+# Under preload_app the master builds the server with ready=False; only the
+# post_worker_init hook, run in each forked worker, makes /readyz pass
+def test_preloaded_server_is_ready_only_after_the_worker_hook(data_dir):
+    server = serve.create_server(data_dir, ['bnb', 'solana'], ready=False)
+    client = server.test_client()
+    assert client.get('/healthz').status_code == 200
+    assert client.get('/readyz').status_code == 503
+
+    class Worker:
+        wsgi = server
+
+    serve.post_worker_init(Worker())
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json() == {'ready': True, 'chains': {'bnb': 35, 'solana': 35}}
+    assert client.get('/figures/bnb.json').status_code == 200
@@ -0,0 +1,65 @@
+# streaming: chunked per-chain moments against the in-memory chain_features
+import numpy as np
+import pandas as pd
+import pytest
+
+from dex_analysis.data import FEATURE_COLUMNS
+from dex_analysis.features import chain_features
+from dex_analysis.streaming import ChainMoments, chain_aggregates_from_moments, clean_chunk, stream_chain_aggregates
+
+
+def raw_pairs():
+    rng = np.random.default_rng(7)
+    n = 40
+    data = pd.DataFrame({
+        'chain': np.repeat(['bnb', 'ethereum', 'solana', 'base'], n // 4),
+        'projects': [repr(['uniswap', 'sushiswap'][:i % 3]) for i in range(n)],
+        'one_day_volume': rng.uniform(0, 5e9, n),
+        'seven_day_volume': rng.uniform(0, 5e10, n),
+        'thirty_day_volume': rng.uniform(0, 5e11, n),
+        'all_time_volume': rng.uniform(0, 5e12, n),
+        'usd_liquidity': rng.uniform(0, 5e9, n),
+        'seven_day_volume_liquidity_ratio': rng.uniform(0, 10, n),
+    })
+    data.loc[[1, 12, 25], 'one_day_volume'] = np.nan
+    data.loc[[3, 30], 'usd_liquidity'] = np.inf
+    data.loc[[14, 22], 'seven_day_volume_liquidity_ratio'] = -np.inf
+    data.loc[5, 'thirty_day_volume'] = np.inf
+    return data
+
+
+def assert_same_aggregates(streamed, expected):
+    streamed = streamed.set_index('chain').sort_index()
+    expected = expected.set_index('chain').sort_index()
+    for col in FEATURE_COLUMNS + ['liquidity_ratio']:
+        assert np.isfinite(streamed[col]).all(), col
+        np.testing.assert_allclose(streamed[col], expected[col], rtol=1e-9, err_msg=col)
+
+
+@pytest.mark.parametrize('chunksize', [7, 40])
+def test_chunks_with_nan_and_inf_match_chain_features(chunksize):
+    data = raw_pairs()
+    moments = ChainMoments()
+    for start in range(0, len(data), chunksize):
+        moments.update(clean_chunk(data.iloc[start:start + chunksize].copy()))
+    expected = chain_features(clean_chunk(data.copy()))
+    assert_same_aggregates(chain_aggregates_from_moments(moments), expected)
+
+
+def test_stream_chain_aggregates_reads_csv_chunks(tmp_path):
+    data = raw_pairs()
+    paths = []
+    for chain, part in data.groupby('chain'):
+        path = tmp_path / f'dex_pairs_{chain}.csv'
+        part.to_csv(path, index=False)
+        paths.append(str(path))
+    expected = chain_features(clean_chunk(data.copy()))
+    assert_same_aggregates(stream_chain_aggregates(paths, chunksize=4), expected)
+
+
+def test_merge_matches_a_single_pass():
+    data = clean_chunk(raw_pairs())
+    whole = ChainMoments().update(data)
+    merged = ChainMoments().update(data.iloc[::2]).merge(ChainMoments().update(data.iloc[1::2]))
+    summary, expected = merged.summary(), whole.summary()
+    np.testing.assert_allclose(summary.to_numpy(), expected.loc[summary.index, summary.columns].to_numpy(), rtol=1e-9)